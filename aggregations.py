@@ -0,0 +1,75 @@
+"""Tablas agregadas que usan los gráficos del dashboard.
+
+Los géneros se separan una sola vez en una tabla larga (un género por fila,
+como categoría) y las fechas se convierten una sola vez; todas las tablas de
+los gráficos salen de ahí con operaciones vectorizadas de pandas. En datasets
+con varias instantáneas el mismo libro aparece muchas veces con la misma lista
+de géneros, así que la tabla larga se construye por lista distinta y cada
+libro apunta a la suya con un código.
+"""
+import numpy as np
+import pandas as pd
+
+# Géneros de cada libro que cuentan en el gráfico por año
+genres_per_book_by_year = 2
+
+
+def genre_table(genres):
+    # Devuelve (códigos, tabla): códigos[i] es la lista de géneros del libro i (-1 si no tiene)
+    # y la tabla tiene una fila por (lista, posición, género)
+    codes, lists = pd.factorize(genres)
+    table = pd.Series(lists, dtype=object).astype(str).str.split(',').explode().str.strip()
+    table = pd.DataFrame({'Lista': table.index.to_numpy(), 'Género': table.to_numpy()})
+    table = table[table['Género'] != ''].reset_index(drop=True)
+    table['Posición'] = table.groupby('Lista').cumcount()
+    table['Género'] = table['Género'].astype('category')
+    return codes, table
+
+
+def publication_years(books):
+    # Año de publicación ('dd-mm-aaaa' en los datasets); NaN si no hay fecha válida
+    dates = pd.to_datetime(books['Fecha de publicación'], format='%d-%m-%Y', errors='coerce')
+    return dates.dt.year
+
+
+def top_genres(codes, genres, n=10):
+    # Cada lista de géneros cuenta tantas veces como libros la tienen
+    books_per_list = np.bincount(codes[codes >= 0], minlength=len(genres) and genres['Lista'].max() + 1)
+    counts = (genres.assign(Popularidad=books_per_list[genres['Lista'].to_numpy()])
+              .groupby('Género', observed=True)['Popularidad'].sum()
+              .sort_values(ascending=False, kind='stable').head(n))
+    return pd.DataFrame({'Género': counts.index.astype(str), 'Popularidad': counts.to_numpy()})
+
+
+def genre_count_by_year(codes, genres, years):
+    # Libros por año y por cada uno de sus primeros géneros
+    books = pd.DataFrame({'Lista': codes, 'Año de publicación': years.to_numpy()})
+    books = books[books['Lista'] >= 0].groupby(['Lista', 'Año de publicación']).size().rename('Cantidad')
+    first_genres = genres.loc[genres['Posición'] < genres_per_book_by_year, ['Lista', 'Género']]
+    counts = first_genres.merge(books.reset_index(), on='Lista')
+    return (counts.groupby(['Año de publicación', 'Género'], observed=True)['Cantidad'].sum()
+            .reset_index())
+
+
+def build_insights(books):
+    books = books.reset_index(drop=True)
+    codes, genres = genre_table(books['Genres'])
+    insights = {'top_genres': top_genres(codes, genres)}
+
+    if 'Fecha de publicación' in books.columns:
+        years = publication_years(books)
+        insights['genre_count_by_year'] = genre_count_by_year(codes, genres, years)
+        insights['all_years'] = sorted(years.dropna().unique())
+
+        books_by_year = years.value_counts().sort_index()
+        insights['books_by_year'] = pd.DataFrame({'Año de publicación': books_by_year.index,
+                                                  'Cantidad de Libros': books_by_year.to_numpy()})
+
+        if 'Páginas' in books.columns:
+            # Primer género de cada libro, para el gráfico de páginas por género
+            first_genre = genres[genres['Posición'] == 0].set_index('Lista')['Género'].astype(str)
+            pages_genres = books[['Título', 'Páginas']].assign(
+                **{'Primer Género': first_genre.reindex(codes).to_numpy()})
+            insights['pages_genres'] = pages_genres.dropna(subset=['Páginas', 'Primer Género'])
+
+    return insights
@@ -0,0 +1,38 @@
+"""Escritura atómica de ficheros.
+
+Cada fichero se escribe en un temporal con nombre único junto a él y se publica
+con os.replace: quien lo lee ve la versión anterior o la nueva, nunca una a
+medias, aunque varios hilos (sesiones del dashboard) o procesos lo escriban a
+la vez. key_lock() da un cerrojo por clave para que los hilos de un proceso no
+construyan dos veces lo mismo.
+"""
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+@contextmanager
+def replacing(path):
+    # Ruta temporal donde escribir 'path'; al salir sin error se publica y si no se borra
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.',
+                                    suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def key_lock(key):
+    # El mismo threading.Lock para la misma clave en todo el proceso
+    with _locks_lock:
+        return _locks.setdefault(key, threading.Lock())
@@ -0,0 +1,92 @@
+"""Compara el cálculo original de las tablas de los gráficos (Counter sobre un único
+string con todos los géneros, varios .apply por fila y fechas sin formato) con
+aggregations.build_insights sobre un dataset grande de varias instantáneas: todos los
+CSV del repositorio repetidos como si fueran scrapings de fechas distintas.
+
+    python benchmarks/bench_aggregations.py [--snapshots N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import aggregations  # noqa: E402
+import storage  # noqa: E402
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+columns = ['Ranking', 'Título', 'Autor', 'Genres', 'Páginas', 'Fecha de publicación']
+
+
+def legacy_insights(df):
+    # Copia de compute_insights original de goodreads.py
+    df = df.copy()
+    insights = {}
+
+    all_genres = ', '.join(df['Genres'].dropna()[df['Genres'].apply(lambda x: isinstance(x, str))])
+    genre_counts = Counter(all_genres.split(', '))
+    genres_df = pd.DataFrame(genre_counts.items(), columns=['Género', 'Popularidad']).sort_values(by='Popularidad', ascending=False)
+    insights['top_genres'] = genres_df.head(10)
+
+    df['Año de publicación'] = pd.to_datetime(df['Fecha de publicación'], errors='coerce').dt.year
+    df['Genres'] = df['Genres'].apply(lambda x: [genre.strip() for genre in str(x).split(',')])
+    df['Género'] = df['Genres'].apply(lambda x: x[:2] if isinstance(x, list) else [])
+    df_exploded = df.explode('Género')
+    insights['exploded'] = df_exploded
+    insights['genre_count_by_year'] = df_exploded.groupby(['Año de publicación', 'Género']).size().reset_index(name='Cantidad')
+    insights['all_years'] = sorted(df['Año de publicación'].dropna().unique())
+
+    books_by_year = df['Año de publicación'].value_counts().reset_index()
+    books_by_year.columns = ['Año de publicación', 'Cantidad de Libros']
+    books_by_year = books_by_year.sort_values(by='Año de publicación', ascending=True)
+    insights['books_by_year'] = books_by_year[books_by_year['Cantidad de Libros'] > 0]
+
+    df['Primer Género'] = df['Genres'].apply(lambda x: x[0].replace("['", "").replace("'", "").strip() if isinstance(x, list) else None)
+    insights['pages_genres'] = df.dropna(subset=['Páginas', 'Primer Género'])
+    return insights
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--snapshots', type=int, default=100, help='veces que se repite cada lista')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(repo_dir, '*_most_read_books_*.csv')))
+    lists = pd.concat([storage.read_legacy_csv(path, columns) for path in paths], ignore_index=True)
+    books = pd.concat([lists] * args.snapshots, ignore_index=True)
+    print(f'{len(paths)} CSV x {args.snapshots} instantáneas = {len(books)} filas')
+
+    with warnings.catch_warnings():
+        # pd.to_datetime sin formato avisa de que lo deduce fila a fila
+        warnings.simplefilter('ignore', UserWarning)
+        legacy, legacy_time = timed(legacy_insights, books)
+    insights, vector_time = timed(aggregations.build_insights, books)
+
+    print(f'compute_insights original:    {legacy_time:7.3f} s')
+    print(f'aggregations.build_insights:  {vector_time:7.3f} s')
+    print(f'Aceleración: x{legacy_time / vector_time:.1f}')
+
+    legacy_top = legacy['top_genres'].set_index('Género')['Popularidad']
+    top = insights['top_genres'].set_index('Género')['Popularidad']
+    if not legacy_top.reindex(top.index).eq(top).all():
+        print('AVISO: los géneros más populares no coinciden')
+    # El original deduce el formato de la primera fecha (mm-dd-aaaa) y pierde las de día > 12
+    legacy_dated = legacy['books_by_year']['Cantidad de Libros'].sum()
+    dated = insights['books_by_year']['Cantidad de Libros'].sum()
+    print(f'Libros con año de publicación: {legacy_dated} (original), {dated} (build_insights)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Memoria del dashboard con varias sesiones abiertas sobre un dataset grande de varias
+instantáneas (todos los CSV del repositorio repetidos --snapshots veces).
+
+Original: cada sesión recibe su copia del DataFrame (st.cache_data la devuelve deserializando
+el resultado guardado) con la columna Reviews entera, más un índice {fila: reseñas}
+decodificado una vez por proceso. Ahora: un único DataFrame con títulos, autores y géneros
+como categorías, compartido por todas las sesiones, y las reseñas en review_store (fichero
+Arrow mapeado en memoria). Se mide el heap de Python (tracemalloc) y la memoria reservada
+por Arrow; las páginas del fichero mapeado no se cuentan porque las comparte el sistema.
+
+    python benchmarks/bench_memory.py [--snapshots N] [--sessions N]
+"""
+import argparse
+import gc
+import glob
+import os
+import pickle
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+import review_codec  # noqa: E402
+import review_store  # noqa: E402
+import storage  # noqa: E402
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(build):
+    # Memoria que sigue ocupada por lo que devuelve build(): heap de Python y de Arrow, en MB
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    python = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, python / 2**20, (pa.total_allocated_bytes() - arrow_before) / 2**20
+
+
+def legacy_sessions(books, sessions):
+    index = dict(enumerate(books['Reviews'].map(review_codec.decode_reviews)))
+    cached = pickle.dumps(books)
+    return index, [pickle.loads(cached) for _ in range(sessions)]
+
+
+def compact_sessions(books, sessions, directory):
+    store = review_store.open_store('bench', lambda: storage.review_batches(
+        enumerate(books['Reviews'].map(review_codec.decode_reviews))), directory)
+    df = storage.compact_books(books.drop(columns=['Reviews']))
+    return store, [df] * sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--snapshots', type=int, default=5, help='veces que se repite cada lista')
+    parser.add_argument('--sessions', type=int, default=8, help='sesiones abiertas sobre el dataset')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(repo_dir, '*_most_read_books_*.csv')))
+    lists = pd.concat([storage.read_legacy_csv(p) for p in paths], ignore_index=True)
+    books = pd.concat([lists] * args.snapshots, ignore_index=True)
+    print(f'{len(paths)} CSV x {args.snapshots} instantáneas = {len(books)} filas, {args.sessions} sesiones')
+
+    _, python, arrow = measure(lambda: legacy_sessions(books, args.sessions))
+    print(f'original:  Python {python:8.1f} MB, Arrow {arrow:8.1f} MB')
+    with tempfile.TemporaryDirectory() as directory:
+        (store, _), python, arrow = measure(lambda: compact_sessions(books, args.sessions, directory))
+        print(f'compacto:  Python {python:8.1f} MB, Arrow {arrow:8.1f} MB, '
+              f'fichero mapeado {os.path.getsize(store.path) / 2**20:.1f} MB ({len(store)} reseñas)')
+
+
+if __name__ == '__main__':
+    main()
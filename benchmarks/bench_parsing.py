@@ -0,0 +1,76 @@
+"""Compara el parseo original (html.parser sobre el texto, árbol completo) con el actual
+(lxml sobre los bytes, restringido con SoupStrainer) en páginas de libros.
+
+    python benchmarks/bench_parsing.py                    # páginas sintéticas a partir de los CSV
+    python benchmarks/bench_parsing.py --pages fixtures/  # páginas .html grabadas
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper  # noqa: E402
+from synthetic_pages import book_pages  # noqa: E402
+
+
+@contextmanager
+def legacy_parsing():
+    # Reproduce el camino anterior: html.parser y árbol completo
+    parser, strainer = scraper.html_parser, scraper.book_page_strainer
+    scraper.html_parser, scraper.book_page_strainer = 'html.parser', None
+    try:
+        yield
+    finally:
+        scraper.html_parser, scraper.book_page_strainer = parser, strainer
+
+
+def measure(pages, decode):
+    # Tiempo de CPU medio por página (sin tracemalloc, que lo distorsiona) y memoria pico
+    inputs = [(content.decode('utf-8'), None) if decode else (content, 'utf-8') for content in pages]
+    start = time.process_time()
+    results = [scraper.parse_book_page(data, encoding) for data, encoding in inputs]
+    cpu = (time.process_time() - start) / len(pages)
+    peak = 0
+    for data, encoding in inputs:
+        tracemalloc.start()
+        scraper.parse_book_page(data, encoding)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return cpu, peak, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', help='directorio con páginas de libros grabadas (*.html)')
+    parser.add_argument('--limit', type=int, default=50, help='número máximo de páginas')
+    args = parser.parse_args()
+
+    if args.pages:
+        paths = sorted(glob.glob(os.path.join(args.pages, '**', '*.html'), recursive=True))[:args.limit]
+        pages = [open(path, 'rb').read() for path in paths]
+    else:
+        pages = book_pages(args.limit)
+    if not pages:
+        raise SystemExit('No hay páginas para el benchmark')
+    size = sum(len(p) for p in pages) / len(pages)
+    print(f'{len(pages)} páginas, {size / 1024:.0f} KiB de media')
+
+    with legacy_parsing():
+        legacy_cpu, legacy_peak, legacy_results = measure(pages, decode=True)
+    cpu, peak, results = measure(pages, decode=False)
+
+    print(f'{"":24}{"CPU/página":>14}{"memoria pico":>16}')
+    print(f'{"html.parser completo":24}{legacy_cpu * 1000:>11.1f} ms{legacy_peak / 2**20:>12.1f} MiB')
+    print(f'{scraper.html_parser + " + SoupStrainer":24}{cpu * 1000:>11.1f} ms{peak / 2**20:>12.1f} MiB')
+    print(f'Aceleración: x{legacy_cpu / cpu:.1f}; memoria: x{legacy_peak / peak:.1f} menos')
+    if results != legacy_results:
+        print('AVISO: los resultados de ambos parsers no coinciden')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Pipeline completo de scraping sin conexión. Sirve unas fixtures (grabadas con
+`replay.py record` o, si no se indican, páginas sintéticas generadas con synthetic_pages)
+desde replay.ReplayServer y ejecuta scraper.scrape_batch contra él con distintas
+combinaciones de hilos, parser HTML y caché de páginas (fría o ya llena). Cada combinación
+se ejecuta en un proceso nuevo; se informa de las páginas por segundo hasta terminar las
+descargas, el tiempo total (incluida la escritura del dataset y el análisis de reseñas),
+el tiempo de parseo por página y la memoria residente máxima.
+
+    python benchmarks/bench_pipeline.py [--fixtures fixtures/US_y] [--books 50] [--review-limit 0]
+        [--workers 1 4 8] [--parsers lxml html.parser] [--caches cold warm] [--latency 0.02]
+"""
+import argparse
+import ast
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+import pandas as pd  # noqa: E402
+
+import replay  # noqa: E402
+import scraper  # noqa: E402
+from synthetic_pages import book_page, list_page, review_page  # noqa: E402
+
+reviews_per_page = 30
+
+
+def synthetic_fixtures(directory, books, reviews=0):
+    # Lista US/y con los primeros 'books' libros del CSV y, si 'reviews', sus páginas de reseñas
+    store = replay.FixtureStore(directory)
+    df = pd.read_csv(os.path.join(repo_dir, 'US_most_read_books_y.csv')).head(books)
+    store.put(f'{scraper.base_url}/book/most_read?category=all&country=US&duration=y', 200, list_page(df))
+    for i, row in df.iterrows():
+        store.put(f'{scraper.base_url}/book/show/{i}', 200, book_page(row))
+        base = ast.literal_eval(row['Reviews'])
+        for page in range(1, -(-reviews // reviews_per_page) + 2) if reviews else []:
+            start = (page - 1) * reviews_per_page
+            cards = [{**base[j % len(base)], 'content': f"{base[j % len(base)]['content']} ({j})"}
+                     for j in range(start, min(start + reviews_per_page, reviews))]
+            store.put(scraper.review_page_url(f'/book/show/{i}', page), 200, review_page(cards))
+    store.save(countries=['US'], durations=['y'], review_limit=reviews)
+    return store
+
+
+def run_child(config):
+    # Se ejecuta en el proceso hijo: un scraping completo contra el servidor de fixtures
+    import resource
+
+    import page_cache
+    from metrics import RunMetrics
+
+    scraper.base_url = config['base_url']
+    scraper.html_parser = config['parser']
+    # Se mide la caché tal cual: un scraping completo no revalida las páginas que aún no han caducado
+    scraper.revalidate_full_scrapes = False
+    page_cache.set_default_cache(page_cache.PageCache(config['cache_dir']))
+    os.chdir(config['output_dir'])
+
+    metrics = RunMetrics()
+    fetched = {}
+
+    def progress(done, total):
+        if done == total:
+            fetched['elapsed'] = metrics.elapsed()
+
+    results = scraper.scrape_batch(config['countries'], config['durations'], config['output_dir'], config['workers'],
+                                   rate=10000, progress_callback=progress, reviews=config['review_limit'],
+                                   metrics=metrics)
+    summary = metrics.summary()
+    fetch_elapsed = fetched.get('elapsed', summary['elapsed_s'])
+    print(json.dumps({'pages': summary['pages'], 'requests': summary['requests'], 'cache_hits': summary['cache_hits'],
+                      'fetch_s': fetch_elapsed, 'total_s': summary['elapsed_s'],
+                      'pages_per_second': summary['pages'] / fetch_elapsed if fetch_elapsed else None,
+                      'parse_mean_ms': summary['parse'].get('mean_ms'), 'parse_p95_ms': summary['parse'].get('p95_ms'),
+                      'skipped': summary['skipped'], 'datasets': sum(1 for f in results.values() if f),
+                      'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def run(config):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(config)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='directorio grabado con replay.py record')
+    parser.add_argument('--books', type=int, default=50, help='libros de la lista sintética')
+    parser.add_argument('--review-limit', type=int, default=0, help='reseñas por libro (páginas de reseñas)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--parsers', nargs='+', default=[scraper.html_parser])
+    parser.add_argument('--caches', nargs='+', default=['cold'], choices=['cold', 'warm'])
+    parser.add_argument('--latency', type=float, default=0.02, help='retardo por petición del servidor (segundos)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fixtures:
+            store = replay.FixtureStore(args.fixtures)
+        else:
+            store = synthetic_fixtures(os.path.join(tmp, 'fixtures'), args.books, args.review_limit)
+        review_limit = store.meta.get('review_limit', args.review_limit)
+        print(f"{len(store)} páginas grabadas, listas {store.meta['countries']} x {store.meta['durations']}, "
+              f'{review_limit} reseñas/libro, latencia {args.latency * 1000:.0f} ms')
+
+        with replay.ReplayServer(store, latency=args.latency) as server:
+            for n, (workers, html_parser, cache) in enumerate(itertools.product(args.workers, args.parsers, args.caches)):
+                config = {'base_url': server.url, 'parser': html_parser, 'workers': workers,
+                          'countries': store.meta['countries'], 'durations': store.meta['durations'],
+                          'review_limit': review_limit, 'cache_dir': os.path.join(tmp, f'cache{n}'),
+                          'output_dir': os.path.join(tmp, f'output{n}')}
+                os.makedirs(config['output_dir'])
+                if cache == 'warm':
+                    run(config)
+                misses = len(server.misses)
+                result = run(config)
+                print(f"{workers:2d} hilos, {html_parser:11s}, caché {cache:4s}: "
+                      f"{result['pages_per_second']:7.1f} páginas/s ({result['pages']} en {result['fetch_s']:.2f} s), "
+                      f"total {result['total_s']:6.2f} s, parseo {result['parse_mean_ms']} ms "
+                      f"(p95 {result['parse_p95_ms']}), {result['requests']} peticiones, "
+                      f"{result['cache_hits']} de caché, RSS {result['rss_mb']:.0f} MB"
+                      + (f", {len(server.misses) - misses} páginas no grabadas" if len(server.misses) > misses else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Memoria del modo de recogida de reseñas. Scrapea una lista sintética (páginas de
+synthetic_pages servidas sin red) con distintos límites de reseñas por libro y mide el pico
+de memoria de Python (tracemalloc) del scraping, la escritura del dataset y el análisis de
+sentimiento y palabras, que leen las reseñas por lotes del stream en disco.
+
+    python benchmarks/bench_review_stream.py [--books N] [--reviews 30 1500]
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import http_client  # noqa: E402
+import page_cache  # noqa: E402
+import scraper  # noqa: E402
+import storage  # noqa: E402
+from synthetic_pages import book_page, list_page, repo_dir, review_page  # noqa: E402
+
+reviews_per_page = 30
+
+
+def fake_site(books, total_reviews):
+    # Sustituye las descargas por páginas sintéticas: cada libro tiene 'total_reviews' reseñas
+    # repartidas en páginas de 30 (las del CSV repetidas y numeradas)
+    def get(url, rate=None, **kwargs):
+        path = url[len(scraper.base_url):]
+        if path.startswith('/book/most_read'):
+            content = list_page(books)
+        else:
+            match = re.match(r'/book/show/(\d+)(/reviews\?page=(\d+))?', path)
+            row = books.loc[int(match.group(1))]
+            if match.group(2) is None:
+                content = book_page(row)
+            else:
+                base = ast.literal_eval(row['Reviews'])
+                start = (int(match.group(3)) - 1) * reviews_per_page
+                end = min(start + reviews_per_page, total_reviews)
+                content = review_page([{**base[i % len(base)], 'content': f"{base[i % len(base)]['content']} ({i})"}
+                                       for i in range(start, end)])
+        return page_cache.CachedResponse(200, content)
+
+    http_client.get = get
+    page_cache.cached_get = get
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=1, help='libros de la lista')
+    parser.add_argument('--reviews', type=int, nargs='+', default=[30, 1500], help='límites de reseñas por libro')
+    args = parser.parse_args()
+
+    books = pd.read_csv(os.path.join(repo_dir, 'US_most_read_books_y.csv')).head(args.books)
+    fake_site(books, max(args.reviews))
+    print(f'{args.books} libros')
+    with tempfile.TemporaryDirectory() as directory:
+        for limit in args.reviews:
+            filename = os.path.join(directory, f'{limit}', 'US_most_read_books_y')
+            os.makedirs(os.path.dirname(filename))
+            tracemalloc.start()
+            start = time.perf_counter()
+            scraper.scrape_and_save('US', 'y', filename, workers=4, reviews=limit)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            total = sum(len(batch) for batch in storage.iter_reviews(filename))
+            print(f'{limit:6d} reseñas/libro: {total:7d} reseñas, {elapsed:7.1f} s, pico {peak / 2**20:6.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
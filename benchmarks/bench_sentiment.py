@@ -0,0 +1,68 @@
+"""Compara la puntuación de sentimiento original (un SentimentIntensityAnalyzer nuevo por
+libro y un bucle de polarity_scores) con nlp.score_texts (léxico cargado una vez por
+proceso, bloques repartidos en un pool de procesos) sobre las reseñas de los CSV del repositorio.
+
+    python benchmarks/bench_sentiment.py [--workers N] [--limit-files N]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nlp  # noqa: E402
+import storage  # noqa: E402
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # noqa: E402
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def legacy_analyze_sentiment(reviews):
+    # Copia de la función original de goodreads.py
+    analyzer = SentimentIntensityAnalyzer()
+    sentiments = []
+    for review in reviews:
+        score = analyzer.polarity_scores(review['content'])
+        if score['compound'] >= 0.7:
+            sentiments.append('Muy positivo')
+        elif 0.05 <= score['compound'] < 0.7:
+            sentiments.append('Positivo')
+        elif -0.05 < score['compound'] < 0.05:
+            sentiments.append('Neutral')
+        elif -0.7 <= score['compound'] <= -0.05:
+            sentiments.append('Negativo')
+        else:
+            sentiments.append('Muy negativo')
+    return sentiments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--limit-files', type=int, help='número máximo de CSV a leer')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(repo_dir, '*_most_read_books_*.csv')))[:args.limit_files]
+    books = [reviews for path in paths for reviews in storage.read_reviews_index(path).values()]
+    texts = [review['content'] for reviews in books for review in reviews]
+    print(f'{len(paths)} CSV, {len(books)} libros, {len(texts)} reseñas, {args.workers} procesos')
+
+    start = time.perf_counter()
+    legacy = [label for reviews in books for label in legacy_analyze_sentiment(reviews)]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, labels = nlp.score_texts(texts, workers=args.workers)
+    batch_time = time.perf_counter() - start
+
+    print(f'analyze_sentiment original: {legacy_time:7.2f} s ({len(texts) / legacy_time:7.0f} reseñas/s)')
+    print(f'nlp.score_texts:            {batch_time:7.2f} s ({len(texts) / batch_time:7.0f} reseñas/s)')
+    print(f'Aceleración: x{legacy_time / batch_time:.1f}')
+    if list(labels) != legacy:
+        print('AVISO: las etiquetas no coinciden')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Arranque en frío de la aplicación y del scraping sin interfaz. Cada escenario se ejecuta
+en un proceso nuevo y mide el tiempo hasta el primer render (AppTest de Streamlit ejecutando
+goodreads.py), la memoria residente máxima del proceso y qué paquetes pesados se han importado.
+
+Escenarios:
+    app          primera ejecución del script sin dataset seleccionado
+    app-dataset  primera ejecución y selección de un dataset (tabla y gráficos de géneros)
+    scrape       importar scraper.py, lo que hace el modo sin interfaz antes de descargar nada
+
+    python benchmarks/bench_startup.py [--dataset US_most_read_books_y.csv] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+heavy_modules = ['streamlit', 'plotly.express', 'wordcloud', 'matplotlib', 'vaderSentiment', 'bs4', 'requests', 'pyarrow']
+
+# Código que se ejecuta en el proceso hijo; imprime una línea JSON con los resultados
+child_code = '''
+import json, resource, sys, time
+scenario, dataset = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if scenario == 'scrape':
+    import scraper
+    ready = time.perf_counter()
+    render = None
+else:
+    from streamlit.testing.v1 import AppTest
+    ready = time.perf_counter()
+    at = AppTest.from_file('goodreads.py', default_timeout=120)
+    at.run()
+    if scenario == 'app-dataset':
+        box = next(s for s in at.sidebar.selectbox if s.label == 'Cargar un archivo')
+        box.set_value(dataset).run()
+    assert not at.exception, at.exception
+    render = time.perf_counter() - ready
+total = time.perf_counter() - start
+print(json.dumps({'total_s': total, 'render_s': render,
+                  'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  'modules': [m for m in %r if m in sys.modules]}))
+''' % (heavy_modules,)
+
+
+def run(scenario, dataset):
+    output = subprocess.run([sys.executable, '-c', child_code, scenario, dataset], cwd=repo_dir,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default='US_most_read_books_y.csv')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scenarios', nargs='+', default=['app', 'app-dataset', 'scrape'])
+    args = parser.parse_args()
+
+    for scenario in args.scenarios:
+        results = [run(scenario, args.dataset) for _ in range(args.repeat)]
+        total = statistics.median(r['total_s'] for r in results)
+        rss = statistics.median(r['rss_mb'] for r in results)
+        line = f'{scenario:12s} total {total:6.2f} s'
+        if results[0]['render_s'] is not None:
+            line += f", primer render {statistics.median(r['render_s'] for r in results):6.2f} s"
+        print(f"{line}, RSS {rss:6.1f} MB, importa: {', '.join(results[0]['modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
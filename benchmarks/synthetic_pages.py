@@ -0,0 +1,90 @@
+"""Páginas HTML sintéticas con la estructura de Goodreads, generadas a partir de los CSV del repositorio.
+
+Sirven para los benchmarks cuando no hay páginas reales grabadas. Imitan el tamaño
+y el ruido de las páginas reales (navegación, un bloque JSON enorme en un <script>,
+tarjetas de reseñas con mucho marcado alrededor del texto).
+"""
+import ast
+import glob
+import html
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _noise(n, tag='div'):
+    return ''.join(f'<{tag} class="Noise Noise__{i % 7}"><a href="/nav/{i}">Enlace {i}</a><span>·</span></{tag}>'
+                   for i in range(n))
+
+
+def _publication_info(date):
+    try:
+        return 'First published ' + datetime.strptime(date, '%d-%m-%Y').strftime('%B %-d, %Y')
+    except (TypeError, ValueError):
+        return ''
+
+
+def _review_cards(reviews):
+    return ''.join(
+        '<article class="ReviewCard"><div class="ReviewerProfile">' + _noise(12) + '</div>'
+        + (f'<span class="RatingStars RatingStars__small" aria-label="Rating {r["rating"]} out of 5"></span>' if r['rating'] else '')
+        + f'<section class="ReviewText"><span class="Formatted">{html.escape(r["content"])}</span></section>'
+        + '<footer class="SocialFooter">' + _noise(8, 'button') + '</footer></article>'
+        for r in reviews)
+
+
+def book_page(row):
+    reviews = ast.literal_eval(row['Reviews']) if isinstance(row['Reviews'], str) else []
+    genres = [g.strip() for g in str(row['Genres']).split(',') if g.strip()]
+    pages = row.get('Páginas', row.get('Pages'))
+    review_cards = _review_cards(reviews)
+    next_data = json.dumps({'props': {'reviews': reviews, 'synopsis': row['Synopsis'], 'padding': ['x' * 64] * 3000}})
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>' + html.escape(str(row['Título']).strip()) + '</title>'
+        + '<script id="__NEXT_DATA__" type="application/json">' + next_data + '</script></head><body>'
+        + '<header>' + _noise(300) + '</header><main>'
+        + '<div class="BookPageMetadataSection"><div class="BookPageMetadataSection__description">'
+        + f'<span class="Formatted">{html.escape(str(row["Synopsis"]))}</span></div>'
+        + ''.join(f'<span class="BookPageMetadataSection__genreButton"><a><span class="Button__labelItem">{html.escape(g)}</span></a></span>' for g in genres)
+        + '<div class="FeaturedDetails">'
+        + (f'<p data-testid="pagesFormat">{int(pages)} pages, Hardcover</p>' if pd.notna(pages) else '')
+        + f'<p data-testid="publicationInfo">{_publication_info(row["Fecha de publicación"])}</p></div></div>'
+        + _noise(400) + '<div class="ReviewsList">' + review_cards + '</div></main>'
+        + '<footer>' + _noise(200) + '</footer></body></html>'
+    ).encode('utf-8')
+
+
+def review_page(reviews):
+    # Una página de /book/show/.../reviews con las reseñas indicadas
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"></head><body><header>' + _noise(300) + '</header>'
+            '<main><div class="ReviewsList">' + _review_cards(reviews) + '</div></main>'
+            '<footer>' + _noise(200) + '</footer></body></html>').encode('utf-8')
+
+
+def list_page(df):
+    rows = ''.join(
+        '<tr itemscope itemtype="http://schema.org/Book">'
+        f'<td class="number">{row["Ranking"]}</td><td>'
+        f'<a class="bookTitle" href="/book/show/{i}"><span>{html.escape(str(row["Título"]))}</span></a>'
+        f'<a class="authorName"><span>{html.escape(str(row["Autor"]))}</span></a>'
+        f'<span class="minirating">{row["Calificación promedio"]} avg rating — {row["Total de calificaciones"]:,} ratings</span>'
+        f'<span class="greyText statistic">{row["Número de lectores"]:,} people shelved this</span>'
+        '</td></tr>'
+        for i, row in df.iterrows())
+    return ('<!DOCTYPE html><html><head><meta charset="utf-8"></head><body><header>' + _noise(300) + '</header>'
+            '<table class="tableList">' + rows + '</table><footer>' + _noise(200) + '</footer></body></html>').encode('utf-8')
+
+
+def book_pages(limit=None):
+    # Una página por libro de los CSV del repositorio
+    pages = []
+    for path in sorted(glob.glob(os.path.join(repo_dir, '*_most_read_books_*.csv'))):
+        for _, row in pd.read_csv(path).iterrows():
+            pages.append(book_page(row))
+            if limit and len(pages) >= limit:
+                return pages
+    return pages
@@ -0,0 +1,20 @@
+"""Listas de Goodreads que se pueden scrapear: países y periodos.
+
+Están aparte de scraper.py para que la aplicación pueda mostrar los selectores
+sin importar la pila de scraping (requests, BeautifulSoup).
+"""
+
+countries = {
+    'Todo el mundo': 'all',
+    'Estados Unidos': 'US',
+    'España': 'ES',
+    'Alemania': 'DE',
+    'Reino Unido': 'GB',
+    'Italia': 'IT',
+    'Canadá': 'CA',
+    'México': 'MX',
+    'Argentina': 'AR',
+    'Australia':'AU'
+}
+
+durations = {'y': 'Últimos 12 meses', 'm': 'Este mes', 'w': 'Esta semana'}
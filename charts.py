@@ -0,0 +1,177 @@
+"""Gráficos del dashboard (Plotly) y nube de palabras.
+
+Este módulo es el único que importa Plotly y WordCloud; goodreads.py lo importa
+dentro de las funciones que dibujan, así que abrir la aplicación o cambiar de
+vista no carga la pila de gráficos hasta que hace falta un gráfico.
+"""
+import io
+from collections import Counter
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+def genre_figures(insights):
+    top_genres = insights['top_genres']
+
+   # Gráfico de barras con Plotly
+    fig_genres = px.bar(top_genres, 
+                        x='Género', 
+                        y='Popularidad', 
+                        text='Popularidad', 
+                        title='Top 10 Géneros Más Populares',  
+                        color='Popularidad', 
+                        color_continuous_scale='Viridis')
+    
+    fig_genres.update_traces(textposition='outside')
+    fig_genres.update_layout(xaxis_title='Género', yaxis_title='Popularidad', showlegend=False)
+    
+    # Trace de la visualización
+    trace = go.Scatterpolar(
+        r=top_genres['Popularidad'],  # Popularidad como el valor radial
+        theta=top_genres['Género'],   # Géneros como las categorías del eje angular
+        fill='toself',  # Llenar el área del gráfico
+        name='Top Géneros',  # Nombre para la leyenda
+        marker=dict(color='cyan'),  # Color de los puntos
+    )
+    
+    # Layout del gráfico
+    layout = go.Layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,  # Hacer visible el eje radial
+                range=[0, top_genres['Popularidad'].max() * 1.1],  # Ajustar el rango radial
+            ),
+            angularaxis=dict(
+                tickmode='array',  # Asegurarse de que se muestren todos los géneros
+                tickvals=top_genres['Género'],  # Etiquetas de los géneros
+            ),
+        ),
+        showlegend=False,  # Ocultar la leyenda si no es necesaria
+        template='plotly_dark',  # Estilo oscuro
+    )
+    
+    # Crear la figura
+    fig = go.Figure(data=[trace], layout=layout)
+    return [fig_genres, fig]
+
+
+def year_figures(insights):
+    # Crear el gráfico de barras apiladas
+    fig_genre_count_by_year = px.bar(
+        insights['genre_count_by_year'],
+        x='Año de publicación',
+        y='Cantidad',
+        color='Género',
+        title='Por Año de Publicación',
+        labels={'Año de publicación': 'Año', 'Cantidad': 'Número de Libros'},
+        barmode='stack',
+        template='plotly_white'
+    )
+    
+    all_years = insights['all_years']
+    fig_genre_count_by_year.update_layout(
+        xaxis=dict(
+            tickmode='array',
+            tickvals=all_years,  # Asegura que se muestren todos los años
+            ticktext=[int(year) for year in all_years]  # Etiquetas de los años
+        )
+    )
+
+    # Crear el gráfico de barras para la cantidad de libros por año
+    fig_books_by_year = px.bar(
+        insights['books_by_year'],
+        x='Año de publicación',
+        y='Cantidad de Libros',
+        title = 'Libros Publicados por Año',
+        labels={'Año de publicación': 'Año', 'Cantidad de Libros': 'Número de Libros'},
+        color='Cantidad de Libros',
+        color_continuous_scale='Viridis',
+        template='plotly_white'
+    )
+    return [fig_genre_count_by_year, fig_books_by_year]
+
+
+def pages_figures(insights):
+    # Crear el gráfico de dispersión
+    fig_pages_genres = px.scatter(
+        insights['pages_genres'],
+        x='Páginas',
+        y='Primer Género',
+        color='Primer Género',
+        title='Relación entre Número de Páginas y Géneros',
+        labels={'Páginas': 'Páginas', 'Primer Género': 'Género'},
+        color_continuous_scale='Viridis',  # O cualquier otra escala de colores
+        template='plotly_white',
+        hover_data=['Título']  # Mostrar el título del libro al pasar el mouse
+    )
+    return [fig_pages_genres]
+
+
+
+def review_figures(word_counts, sentiments):
+    # Gráficos de palabras y de opiniones de un libro
+    # Las palabras más comunes ya vienen ordenadas por 'Frecuencia' en orden descendente
+    most_common_words = word_counts.head(20)
+    
+    # Crear el gráfico de barras con Plotly
+    words_fig = px.bar(most_common_words, 
+                       x='Palabra', 
+                       y='Frecuencia', 
+                       title='Palabras Más Frecuentes en las Reseñas',
+                       labels={'Palabra': 'Palabra', 'Frecuencia': 'Frecuencia'},
+                       color='Frecuencia', 
+                       color_continuous_scale='Viridis')
+    
+    # Crear un DataFrame para la distribución de sentimientos
+    sentiment_df = pd.DataFrame(Counter(sentiments).items(), columns=['Sentimiento', 'Cantidad'])
+    
+    # Ordenar los sentimientos en el orden deseado
+    orderedsentiments = ['Muy positivo', 'Positivo', 'Neutral', 'Negativo', 'Muy negativo']
+    sentiment_df['Sentimiento'] = pd.Categorical(sentiment_df['Sentimiento'], categories=orderedsentiments, ordered=True)
+    
+    # Ordenar el DataFrame por la columna 'Sentimiento' de acuerdo al orden
+    sentiment_df = sentiment_df.sort_values('Sentimiento')
+
+    # Crear un gráfico de barras con Plotly
+    sentiment_fig = px.bar(sentiment_df, 
+                           x='Sentimiento', 
+                           y='Cantidad', 
+                           title='Tipos de Opiniones en las Reseñas',
+                           labels={'Sentimiento': 'Opiniones', 'Cantidad': 'Cantidad de Reseñas'},
+                           color='Sentimiento', 
+                           color_discrete_map={
+                               'Muy positivo': 'green', 
+                               'Positivo': 'lightgreen', 
+                               'Neutral': 'gray', 
+                               'Negativo': 'orange', 
+                               'Muy negativo': 'red'
+                           })
+    return words_fig, sentiment_fig
+
+
+def wordcloud_png(word_counts):
+    # PNG de la nube de palabras de un libro; WordCloud (y con él matplotlib) solo se importa aquí
+    from wordcloud import WordCloud
+    wordcloud = WordCloud(width=800, height=400, background_color='black', colormap='autumn', contour_color='black').generate_from_frequencies(dict(zip(word_counts['Palabra'], word_counts['Frecuencia'])))
+    image = io.BytesIO()
+    wordcloud.to_image().save(image, format='PNG')
+    return image.getvalue()
+
+
+def country_genre_figure(genres_long):
+    return px.bar(genres_long,
+                  x='Género',
+                  y='% de libros',
+                  color='País',
+                  barmode='group',
+                  title='Géneros por País (% de libros de cada lista)')
+
+
+def overlap_figure(matrix, metric):
+    return px.imshow(matrix,
+                     text_auto=True,
+                     color_continuous_scale='Viridis',
+                     labels={'x': 'País', 'y': 'País', 'color': metric},
+                     title='Libros en Común entre Países')
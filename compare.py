@@ -0,0 +1,74 @@
+"""Comparación entre países: todas las listas en una sola tabla.
+
+load_lists() une los datasets de varios países en una tabla larga (una fila por
+libro y lista) con una clave de libro común a todas ellas (snapshots.book_key:
+título + autor normalizados, que también tienen los CSV antiguos sin href), y
+a partir de ella se calculan una sola vez las distribuciones de géneros por
+país y las matrices de libros compartidos.
+"""
+import pandas as pd
+
+import snapshots
+import storage
+
+list_columns = ['Ranking', 'Título', 'Autor', 'Número de lectores', 'Genres', 'href']
+
+
+def load_lists(paths):
+    # Una fila por (país, periodo, libro)
+    frames = []
+    for path in paths:
+        key = storage.dataset_key(path)
+        if key is None:
+            continue
+        books = storage.read_books(path, list_columns)
+        books['País'], books['Periodo'] = key
+        books['Libro'] = [snapshots.book_key(book) for book in books.to_dict('records')]
+        books['Título'] = books['Título'].astype(str).str.strip()
+        frames.append(books)
+    if not frames:
+        return pd.DataFrame(columns=list_columns + ['País', 'Periodo', 'Libro'])
+    lists = pd.concat(frames, ignore_index=True)
+    lists['País'] = lists['País'].astype('category')
+    return lists
+
+
+def unique_books(lists):
+    # Tabla deduplicada de libros con el número de países en los que aparecen
+    books = lists.groupby('Libro', observed=True).agg(
+        Título=('Título', 'first'), Autor=('Autor', 'first'), Genres=('Genres', 'first'),
+        Países=('País', 'nunique'), Mejor_posición=('Ranking', 'min'))
+    return books.rename(columns={'Mejor_posición': 'Mejor posición'}).sort_values(
+        ['Países', 'Mejor posición'], ascending=[False, True])
+
+
+def genre_distribution(lists):
+    # Porcentaje de libros de cada lista que tienen cada género (filas: género, columnas: país)
+    genres = lists[['País', 'Libro', 'Genres']].copy()
+    genres['Género'] = genres['Genres'].map(storage.split_genres)
+    genres = genres.explode('Género', ignore_index=True).dropna(subset=['Género'])
+    counts = pd.crosstab(genres['Género'], genres['País'])
+    totals = lists.groupby('País', observed=True)['Libro'].nunique()
+    return (counts / totals * 100).round(1)
+
+
+def overlap_matrix(lists, relative=False):
+    # Libros en común entre cada par de países (o índice de Jaccard si relative=True)
+    incidence = pd.crosstab(lists['País'], lists['Libro']).clip(upper=1)
+    shared = incidence @ incidence.T
+    if relative:
+        sizes = pd.Series(shared.values.diagonal(), index=shared.index)
+        union = sizes.values[:, None] + sizes.values[None, :] - shared
+        shared = (shared / union).round(2)
+    return shared
+
+
+def build_comparison(paths):
+    lists = load_lists(paths)
+    return {
+        'lists': lists,
+        'books': unique_books(lists),
+        'genres': genre_distribution(lists),
+        'overlap': overlap_matrix(lists),
+        'jaccard': overlap_matrix(lists, relative=True),
+    }
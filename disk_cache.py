@@ -0,0 +1,45 @@
+"""Tamaño máximo de las cachés en disco que se derivan de cada dataset.
+
+Los almacenes de reseñas (.cache/reviews) y el análisis de las reseñas
+(.cache/analysis) tienen un fichero por contenido de dataset, así que cada
+scraping nuevo añade otro. Cada fichero se marca al usarse (touch) y, cuando un
+directorio supera su tamaño máximo, se borran los usados hace más tiempo hasta
+bajar del 90%, como hace page_cache con las páginas.
+"""
+import os
+
+
+def touch(path):
+    # Marca el fichero como usado ahora (su fecha de modificación es la del último uso)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict(directory, max_bytes, keep=()):
+    # LRU: borra los ficheros con uso más antiguo hasta bajar del 90% de max_bytes, salvo los de 'keep'
+    # (los que están abiertos o se acaban de escribir). Los temporales de una escritura (.*) no se tocan
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if not name.startswith('.'):
+            files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    if total <= max_bytes:
+        return
+    keep = {os.path.abspath(path) for path in keep}
+    for _, size, path in sorted(files):
+        if total <= max_bytes * 0.9:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
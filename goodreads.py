@@ -1,280 +1,138 @@
 import streamlit as st
 import pandas as pd
 from collections import Counter
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
-import os
-import time
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import json
+import storage
+import review_codec
+import review_store
+import nlp
+import compare
+import search_index
+import aggregations
+from catalog import countries, durations
+from metrics import RunMetrics
+
+# scraper (requests, BeautifulSoup) y charts (Plotly, WordCloud) se importan dentro de las
+# funciones que los usan: ver un dataset ya guardado no necesita la pila de scraping y cada
+# rerun de Streamlit no paga el import de los gráficos hasta que se dibuja alguno
 
 
 st.set_page_config(page_title='Estadísticas de Goodreads', layout='wide')
 
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36'}
-base_url = 'https://www.goodreads.com'
-
-countries = {
-    'Todo el mundo': 'all',
-    'Estados Unidos': 'US',
-    'España': 'ES',
-    'Alemania': 'DE',
-    'Reino Unido': 'GB',
-    'Italia': 'IT',
-    'Canadá': 'CA',
-    'México': 'MX',
-    'Argentina': 'AR',
-    'Australia':'AU'
-}
-
-def scrape_book_details(book_url):
-    book_page_url = base_url + book_url
-    response = requests.get(book_page_url, headers=headers)
-    time.sleep(1)
-    if response.status_code != 200:
-        st.error(f"Error al obtener datos: {response.status_code}")
-        return
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    genres = [genre.text.strip() for genre in soup.find_all('span', {'class': 'BookPageMetadataSection__genreButton'})]
-    pages_info = soup.find('div', {'class': 'FeaturedDetails'})
-    pages = None
-    publication_date = None
-    if pages_info:
-        pages_text = pages_info.find('p', {'data-testid': 'pagesFormat'})
-        if pages_text:
-            pages = int(pages_text.text.strip().split()[0])
-        pub_date_text = pages_info.find('p', {'data-testid': 'publicationInfo'})
-        if pub_date_text:
-            try:
-                publication_date = datetime.strptime(pub_date_text.text.replace('First published', '').replace('Published', '').strip(), '%B %d, %Y').strftime('%d-%m-%Y')
-            except ValueError:
-                publication_date = None
-    synopsis = soup.find('span', {'class': 'Formatted'})
-    synopsis_text = synopsis.get_text(strip=True) if synopsis else ''
-    reviews = []
-    reviews_list = soup.find_all('article', {'class': 'ReviewCard'})
-    for review in reviews_list:
-        rating = review.find('span', {'class': 'RatingStars RatingStars__small'})
-        review_rating = None
-        if rating:
-            review_rating = int(rating['aria-label'].split()[1])
-        review_content = review.find('span', {'class': 'Formatted'})
-        review_text = review_content.get_text(strip=True) if review_content else ''
-        reviews.append({'rating': review_rating, 'content': review_text})
-    return {
-        'genres': genres,
-        'pages': pages,
-        'publication_date': publication_date,
-        'synopsis': synopsis_text,
-        'reviews': reviews
-    }
-
-def scrape_and_save(country='all', duration='y', filename=None):
+def scrape_and_save(country='all', duration='y', filename=None, progress_callback=None, incremental=False, metrics=None):
+    import scraper
     try:
-        if filename is None:
-            filename = f'{country}_most_read_books_{duration}.csv'
-            
-        url = f'https://www.goodreads.com/book/most_read?category=all&country={country}&duration={duration}'
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            return
-        soup = BeautifulSoup(response.text, 'html.parser')
-        books_container = soup.find('table', {'class': 'tableList'})
-        if not books_container:
-            st.error('No se encontraron datos en Goodreads para los parámetros especificados.')
-            return None
-        
-        data = []
-        for book in books_container.find_all('tr', {'itemtype': 'http://schema.org/Book'}):
-            try:
-                ranking = int(book.find('td', {'class': 'number'}).text)
-                title = book.find('a', {'class': 'bookTitle'}).get_text()
-                author = book.find('a', {'class': 'authorName'}).get_text()
-                avg_rating = float(book.find('span', {'class': 'minirating'}).get_text(strip=True).split(' ')[0])
-                total_rating = int(book.find('span', {'class': 'minirating'}).get_text(strip=True).split(' ')[4].replace(',', ''))
-                readers = int(book.find('span', {'class': 'greyText statistic'}).get_text(strip=True).split()[0].replace(',', ''))
-                href = book.find('a', {'class': 'bookTitle'})['href']
-                book_details = scrape_book_details(href)
-                data.append({
-                    'Ranking': ranking,
-                    'Título': title,
-                    'Autor': author,
-                    'Calificación promedio': avg_rating,
-                    'Total de calificaciones': total_rating,
-                    'Número de lectores': readers,
-                    'Genres': ', '.join(book_details.get('genres', [])),
-                    'Páginas': book_details.get('pages', ''),
-                    'Fecha de publicación': book_details.get('publication_date', ''),
-                    'Synopsis': book_details.get('synopsis', ''),
-                    'Reviews': book_details.get('reviews', [])
-                })
-                
-            except AttributeError:
-                continue
-        if data:
-            df = pd.DataFrame(data)
-            df.to_csv(filename, index=False)
-            return filename
-            
+        return scraper.scrape_and_save(country, duration, filename, progress_callback=progress_callback,
+                                       incremental=incremental, metrics=metrics)
+    except scraper.ScrapeError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"Error inesperado: {e}")
-        
+
+
+def metrics_markdown(summary):
+    # Resumen de las métricas de un scraping para la barra lateral
+    latency = summary['latency']
+    return '\n'.join([
+        f"- **Páginas/s:** {summary['pages_per_second']} ({summary['pages']} páginas en {summary['elapsed_s']} s)",
+        f"- **Peticiones:** {summary['requests']} ({summary['cache_hits']} desde caché, {summary['bytes'] / 2**20:.1f} MB)",
+        f"- **Latencia:** p50 {latency.get('p50_ms')} ms, p95 {latency.get('p95_ms')} ms",
+        f"- **Parseo:** {summary['parse'].get('mean_ms')} ms por página",
+        f"- **Reintentos:** {summary['retries']}, **libros omitidos:** {summary['skipped']}",
+    ])
+
+
+# Columnas que usan las vistas; las reseñas no se quedan en el DataFrame sino en review_store
+view_columns = ['Ranking', 'Título', 'Autor', 'Calificación promedio', 'Total de calificaciones',
+                'Número de lectores', 'Genres', 'Páginas', 'Fecha de publicación', 'Reviews']
+
 
 def load_data(filename):
-    return pd.read_csv(filename)
+    if hasattr(filename, 'read'):
+        # Archivo subido por el usuario: siempre CSV
+        df = storage.read_legacy_csv(filename)
+    else:
+        df = storage.read_books(filename, view_columns)
+    file_hash = storage.content_hash(filename)
+    if 'Reviews' in df.columns:
+        # Las reseñas de un CSV (también de uno subido) pasan al almacén compartido y se quitan de la tabla
+        review_store.open_store(file_hash, lambda: storage.review_batches(
+            enumerate(df['Reviews'].map(review_codec.decode_reviews))))
+        df = df.drop(columns=['Reviews'])
+    df = storage.compact_books(df)
+    df.attrs['source'] = getattr(filename, 'name', filename)
+    df.attrs['hash'] = file_hash
+    return df
+
+
+def dataset_reviews(df):
+    # Almacén de reseñas del dataset, mapeado en memoria y compartido por todas las sesiones
+    return review_store.open_store(df.attrs['hash'], lambda: storage.iter_reviews(df.attrs['source']))
+
+
+def load_reviews(df, row):
+    # Reseñas del libro de la fila 'row' (el Ranking se repite si el CSV une varias listas)
+    return dataset_reviews(df).get(row)
+
+
+def review_batches(df):
+    # Reseñas del dataset por lotes para el análisis, leídas del almacén sin copiarlas todas
+    return dataset_reviews(df).iter_batches()
+
+
+@st.cache_resource(show_spinner='Analizando las reseñas del dataset...', max_entries=32)
+def load_review_analysis(file_hash, _df):
+    # Sentimiento de cada reseña y palabras más frecuentes de cada libro, precalculados por dataset
+    scores, words = nlp.load_review_analysis(file_hash, lambda: review_batches(_df),
+                                             nlp.analysis_dir_for(_df.attrs['source']))
+    # Por fila del libro, como las reseñas
+    scores = scores.sort_values(['Fila', 'Posición'])
+    sentiments_by_book = {int(r): g['Sentimiento'].tolist() for r, g in scores.groupby('Fila')}
+    words_by_book = {int(r): g[['Palabra', 'Frecuencia']].reset_index(drop=True) for r, g in words.groupby('Fila')}
+    return sentiments_by_book, words_by_book
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def load_cached_data(file_hash, _source):
+    # La caché se indexa por el hash del contenido; el origen (ruta o archivo subido) no se hashea.
+    # Es un recurso: todas las sesiones (y st.session_state.df) apuntan al mismo DataFrame, que
+    # no se modifica, en lugar de recibir cada una su copia
+    return load_data(_source)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def compute_insights(file_hash, _df):
+    # Tablas derivadas que usan los gráficos, calculadas una vez por dataset
+    return aggregations.build_insights(_df)
+
+
+# Secciones del análisis: (tabla de insights que necesita, función de charts que construye sus gráficos)
+insight_sections = {
+    'Géneros': ('top_genres', 'genre_figures'),
+    'Por año': ('genre_count_by_year', 'year_figures'),
+    'Páginas': ('pages_genres', 'pages_figures'),
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def insight_figures(file_hash, section, _insights):
+    # Las figuras de cada sección se construyen una vez por dataset y solo cuando se abre la sección
+    import charts
+    return getattr(charts, insight_sections[section][1])(_insights)
+
 
 def show_main_insights(df):
     st.header('Top 50 Libros más Leídos')
     if df is not None:
-        df_resumen = df.drop(columns=['Reviews','Synopsis','Genres'])
+        df_resumen = df.drop(columns=['Reviews','Synopsis','Genres','href','scraped_at'], errors='ignore')
         st.dataframe(df_resumen, hide_index=True)
+        insights = compute_insights(df.attrs['hash'], df)
         # Subheader para géneros más populares
         st.subheader('Análisis de Libros')
-        all_genres = ', '.join(df['Genres'].dropna()[df['Genres'].apply(lambda x: isinstance(x, str))])
-        genre_counts = Counter(all_genres.split(', '))
-        genres_df = pd.DataFrame(genre_counts.items(), columns=['Género', 'Popularidad']).sort_values(by='Popularidad', ascending=False)
-        top_genres = genres_df.head(10)  # Seleccionar los 10 géneros más populares
-       
-       # Gráfico de barras con Plotly
-        fig_genres = px.bar(top_genres, 
-                            x='Género', 
-                            y='Popularidad', 
-                            text='Popularidad', 
-                            title='Top 10 Géneros Más Populares',  
-                            color='Popularidad', 
-                            color_continuous_scale='Viridis')
-        
-        fig_genres.update_traces(textposition='outside')
-        fig_genres.update_layout(xaxis_title='Género', yaxis_title='Popularidad', showlegend=False)
-        st.plotly_chart(fig_genres)
-        
-        # Trace de la visualización
-        trace = go.Scatterpolar(
-            r=top_genres['Popularidad'],  # Popularidad como el valor radial
-            theta=top_genres['Género'],   # Géneros como las categorías del eje angular
-            fill='toself',  # Llenar el área del gráfico
-            name='Top Géneros',  # Nombre para la leyenda
-            marker=dict(color='cyan'),  # Color de los puntos
-        )
-        
-        # Layout del gráfico
-        layout = go.Layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,  # Hacer visible el eje radial
-                    range=[0, top_genres['Popularidad'].max() * 1.1],  # Ajustar el rango radial
-                ),
-                angularaxis=dict(
-                    tickmode='array',  # Asegurarse de que se muestren todos los géneros
-                    tickvals=top_genres['Género'],  # Etiquetas de los géneros
-                ),
-            ),
-            showlegend=False,  # Ocultar la leyenda si no es necesaria
-            template='plotly_dark',  # Estilo oscuro
-        )
-        
-        # Crear la figura y mostrar el gráfico
-        fig = go.Figure(data=[trace], layout=layout)
-        
-        # Mostrar el gráfico en Streamlit
-        st.plotly_chart(fig)
-        
-        if 'Fecha de publicación' in df.columns:
-        # Asegurarse de que las fechas están en formato correcto y extraer el año
-            df['Año de publicación'] = pd.to_datetime(df['Fecha de publicación'], errors='coerce').dt.year
-            
-            # Limpiar y separar géneros en listas
-            df['Genres'] = df['Genres'].apply(lambda x: [genre.strip() for genre in str(x).split(',')])  # Separar géneros y quitar espacios extra
-            
-            # Tomar solo los tres Géneros de cada libro
-            df['Género'] = df['Genres'].apply(lambda x: x[:2] if isinstance(x, list) else [])
-            
-            # Explode para separar los géneros en filas distintas
-            df_exploded = df.explode('Género')
-            
-            # Preparar datos para el gráfico
-            if 'Año de publicación' in df_exploded.columns and 'Género' in df_exploded.columns:
-                # Contar la cantidad de libros por año y primer género
-                genre_count_by_year = df_exploded.groupby(['Año de publicación', 'Género']).size().reset_index(name='Cantidad')
-                
-                # Crear el gráfico de barras apiladas
-                fig_genre_count_by_year = px.bar(
-                    genre_count_by_year,
-                    x='Año de publicación',
-                    y='Cantidad',
-                    color='Género',
-                    title='Por Año de Publicación',
-                    labels={'Año de publicación': 'Año', 'Cantidad': 'Número de Libros'},
-                    barmode='stack',
-                    template='plotly_white'
-                )
-                
-                all_years = sorted(df['Año de publicación'].dropna().unique())
-                fig_genre_count_by_year.update_layout(
-                    xaxis=dict(
-                        tickmode='array',
-                        tickvals=all_years,  # Asegura que se muestren todos los años
-                        ticktext=[int(year) for year in all_years]  # Etiquetas de los años
-                    )
-            )
-                # Mostrar el gráfico
-                st.plotly_chart(fig_genre_count_by_year)
-
-
-            if 'Fecha de publicación' in df.columns:
-                # Asegurarse de que las fechas están en formato correcto y extraer el año
-                df['Año de publicación'] = pd.to_datetime(df['Fecha de publicación'], errors='coerce').dt.year
-                
-                # Contar la cantidad de libros por año
-                books_by_year = df['Año de publicación'].value_counts().reset_index()
-                books_by_year.columns = ['Año de publicación', 'Cantidad de Libros']
-                books_by_year = books_by_year.sort_values(by='Año de publicación', ascending=True)
-                books_by_year = books_by_year[books_by_year['Cantidad de Libros'] > 0]
-
-                # Crear el gráfico de barras para la cantidad de libros por año
-                fig_books_by_year = px.bar(
-                    books_by_year,
-                    x='Año de publicación',
-                    y='Cantidad de Libros',
-                    title = 'Libros Publicados por Año',
-                    labels={'Año de publicación': 'Año', 'Cantidad de Libros': 'Número de Libros'},
-                    color='Cantidad de Libros',
-                    color_continuous_scale='Viridis',
-                    template='plotly_white'
-                )
-            
-                # Mostrar el gráfico
-                st.plotly_chart(fig_books_by_year)
-
-            if 'Páginas' in df.columns and 'Genres' in df.columns:
-               
-                # Tomar solo el primer género de cada libro y asegurarse de que está limpio
-                df['Primer Género'] = df['Genres'].apply(lambda x: x[0].replace("['", "").replace("'", "").strip() if isinstance(x, list) else None)
-                
-                # Filtrar para evitar nulos en 'Páginas' o 'Primer Género'
-                df_filtered = df.dropna(subset=['Páginas', 'Primer Género'])
-                
-                # Crear el gráfico de dispersión
-                fig_pages_genres = px.scatter(
-                    df_filtered,
-                    x='Páginas',
-                    y='Primer Género',
-                    color='Primer Género',
-                    title='Relación entre Número de Páginas y Géneros',
-                    labels={'Páginas': 'Páginas', 'Primer Género': 'Género'},
-                    color_continuous_scale='Viridis',  # O cualquier otra escala de colores
-                    template='plotly_white',
-                    hover_data=['Título']  # Mostrar el título del libro al pasar el mouse
-                )
-                
-                # Mostrar el gráfico
-                st.plotly_chart(fig_pages_genres)
+        sections = [name for name, (table, _) in insight_sections.items() if table in insights]
+        section = st.radio('Sección', sections, horizontal=True, label_visibility='collapsed')
+        for fig in insight_figures(df.attrs['hash'], section, insights):
+            st.plotly_chart(fig)
                 
     else: 
         st.rerun()
@@ -282,86 +140,45 @@ def show_main_insights(df):
    
     
 
+@st.cache_resource(show_spinner=False, max_entries=256)
+def review_figures(file_hash, row, _word_counts, _sentiments):
+    # Gráficos de palabras y de opiniones de un libro, construidos una vez por libro
+    import charts
+    return charts.review_figures(_word_counts, _sentiments)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def wordcloud_image(file_hash, row, _word_counts):
+    # PNG de la nube de palabras de un libro; se genera una sola vez por libro
+    import charts
+    return charts.wordcloud_png(_word_counts)
+
+
 def analyze_book_reviews(df):
     if df is not None:
 
         st.header('Análisis de Reseñas por Libro')
         book_title = st.selectbox('Selecciona un libro', df['Título'].unique())
-        selected_book = df[df['Título'] == book_title].iloc[0]
+        # Primera fila con ese título
+        row = int((df['Título'] == book_title).to_numpy().argmax())
+        selected_book = df.iloc[row]
         st.subheader('Detalles:')
         st.write(f"**Autor:** {selected_book['Autor']}")
         st.write(f"**Calificación promedio:** {selected_book['Calificación promedio']}")
         st.write(f"**Total de calificaciones:** {int(selected_book['Total de calificaciones'])}")
-        st.write(f"**Géneros:** {', '.join(selected_book['Genres']).replace('[', '').replace(']', '')}")
+        st.write(f"**Géneros:** {', '.join(storage.split_genres(selected_book['Genres']))}")
         st.write(f"**Número de lectores:** {selected_book['Número de lectores']}")
-        reviews = eval(selected_book['Reviews'])
-        review_texts = [review['content'] for review in reviews if review['content']]
-        sentiments = analyze_sentiment(reviews)
-        all_words = ' '.join(review_texts).lower().split()
-        
-        # Remove stop words
-        stop_words = {
-        'and', 'if', 'the', 'i', 'to', 'of', 'a', 'in', 'for', 'on', 'is', 
-        'it', 'that', 'this', 'with', 'as', 'are', 'was', 'at', 'by', 
-        'an', 'be', 'not', 'or', 'but', 'from', 'my', 'you', 'your', 
-        'he', 'she', 'they', 'we', 'all', 'so', 'what', 'there', 'when', 
-        'where', 'who', 'which', 'how', 'just', 'like', 'about', 'more', 
-        'than', 'up', 'out', 'some', 'other', 'no', 'yes', 'do', 'does', 
-        'did', 'will', 'would', 'could', 'should', 'y', 'de', 'la', 
-        'que', 'el', 'en', 'los', 'se', 'del', 'por', 'un', 'una', 
-        'con', 'no', 'es', 'para', 'su', 'al', 'como', 'más', 'o', 
-        'pero', 'fue', 'este', 'entre', 'también', 'hasta', 'hay', 
-        'todo', 'esta', 'ser', 'son', 'me', 'si', 'sobre', 'mi', 
-        'te', 'ya', 'muy', 'donde', 'quien', 'cuando', 'qué', 'cómo', 
-        'así', 'solo', 'uno', 'dos', 'tres', 'cuatro', 'cinco', 
-        'seis', 'siete', 'ocho', 'nueve', 'diez', 'otro', 'mismo', 
-        'tanto', 'poco', 'mucho', 'cada', 'algunos', 'ninguna', 
-        'varios', 'entre', 'tras', 'hacia', 'desde', 'durante', 
-        'antes', 'después', 'porque', 'aunque', 'mientras', 'según', 
-        'tal', 'cual', 'donde', 'cuando', 'por qué', 'para que', 
-        'a pesar de', 'en vez de', 'en cuanto a', 'a través de', 
-        '-', '.', ',', 'ha', 'han', 'las', 'le', 'lo', 'ni', 'tan', 
-        'unos', 'una', 'un', 'libro', 'bastante', 'leer', 'book', 
-        'it.', 'one', 'know', 'say', 'see', 'im', 'also', 'after', 
-        'before', 'between', 'during', 'while', 'such', 'these', 
-        'those', 'each', 'few', 'many', 'much', 'most', 'some', 
-        'any', 'none', 'all', 'whole', 'part', 'half', 'each', 'every', 
-        'either', 'neither', 'both', 'few', 'many', 'much', 'most', 
-        'some', 'any', 'none', 'all', 'whole', 'part', 'half', 'each', 
-        'every','can', 'have', 'it\'s', 'her', 'him', 'they', 'them', 'he', 
-        'she' ,'she\'s', 'he\'s', 'read','reading', 'had', 'has','because',
-        'didn\'t', 'his', 'were', 'been', 'get', 'really', 'never', 'can\'t',
-        'don\'t','s', 'into'}
-        
-        filtered_words = [word for word in all_words if word not in stop_words]
-        
-        word_counts = Counter(filtered_words)
+        reviews = load_reviews(df, row)
+        sentiments_by_book, words_by_book = load_review_analysis(df.attrs['hash'], df)
+        sentiments = sentiments_by_book.get(row, [])
+        word_counts = words_by_book.get(row, pd.DataFrame(columns=['Palabra', 'Frecuencia']))
     
-        # Crear un DataFrame con las palabras más comunes
-        most_common_words = pd.DataFrame(word_counts.most_common(20), columns=['Palabra', 'Frecuencia'])
-        
-        # Ordenar el DataFrame en orden descendente por 'Frecuencia'
-        most_common_words = most_common_words.sort_values(by='Frecuencia', ascending=False)
-        
-        # Crear el gráfico de barras con Plotly
-        fig = px.bar(most_common_words, 
-                     x='Palabra', 
-                     y='Frecuencia', 
-                     title='Palabras Más Frecuentes en las Reseñas',
-                     labels={'Palabra': 'Palabra', 'Frecuencia': 'Frecuencia'},
-                     color='Frecuencia', 
-                     color_continuous_scale='Viridis')
-        
-        # Mostrar el gráfico en Streamlit
-        st.plotly_chart(fig)
+        words_fig, sentiment_fig = review_figures(df.attrs['hash'], row, word_counts, sentiments)
+        st.plotly_chart(words_fig)
     
         # Mostrar la nube de palabras
         st.subheader('Palabras Destacadas de las Reseñas')
-        wordcloud = WordCloud(width=800, height=400, background_color='black', colormap='autumn', contour_color='black', stopwords=stop_words).generate(' '.join(filtered_words))
-        plt.figure(figsize=(30, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        st.pyplot(plt)
+        st.image(wordcloud_image(df.attrs['hash'], row, word_counts))
         
         st.subheader('Reseñas Populares (Top 30)')
 
@@ -395,33 +212,8 @@ def analyze_book_reviews(df):
         
         sentiment_counts = Counter(sentiments)
         
-        # Crear un DataFrame para la distribución de sentimientos
-        sentiment_df = pd.DataFrame(sentiment_counts.items(), columns=['Sentimiento', 'Cantidad'])
-        
-        # Ordenar los sentimientos en el orden deseado
-        ordered_sentiments = ['Muy positivo', 'Positivo', 'Neutral', 'Negativo', 'Muy negativo']
-        sentiment_df['Sentimiento'] = pd.Categorical(sentiment_df['Sentimiento'], categories=ordered_sentiments, ordered=True)
-        
-        # Ordenar el DataFrame por la columna 'Sentimiento' de acuerdo al orden
-        sentiment_df = sentiment_df.sort_values('Sentimiento')
-    
-        # Crear un gráfico de barras con Plotly
-        fig = px.bar(sentiment_df, 
-                     x='Sentimiento', 
-                     y='Cantidad', 
-                     title='Tipos de Opiniones en las Reseñas',
-                     labels={'Sentimiento': 'Opiniones', 'Cantidad': 'Cantidad de Reseñas'},
-                     color='Sentimiento', 
-                     color_discrete_map={
-                         'Muy positivo': 'green', 
-                         'Positivo': 'lightgreen', 
-                         'Neutral': 'gray', 
-                         'Negativo': 'orange', 
-                         'Muy negativo': 'red'
-                     })
-        
         # Mostrar el gráfico en Streamlit
-        st.plotly_chart(fig)
+        st.plotly_chart(sentiment_fig)
         
         color_map={
             'Muy positivo': 'green', 
@@ -444,56 +236,134 @@ def analyze_book_reviews(df):
     else:
         st.rerun()
         
-# Función para analizar el sentimiento de las reseñas
-def analyze_sentiment(reviews):
-    analyzer = SentimentIntensityAnalyzer()
-    sentiments = []
-    for review in reviews:
-        score = analyzer.polarity_scores(review['content'])
-        if score['compound'] >= 0.7:
-            sentiments.append('Muy positivo')
-        elif 0.05 <= score['compound'] < 0.7:
-            sentiments.append('Positivo')
-        elif -0.05 < score['compound'] < 0.05:
-            sentiments.append('Neutral')
-        elif -0.7 <= score['compound'] <= -0.05:
-            sentiments.append('Negativo')
-        else:
-            sentiments.append('Muy negativo')
-    return sentiments
+@st.cache_data(show_spinner='Cargando todas las listas...', max_entries=8)
+def load_comparison(file_hashes, _paths):
+    # Todas las listas de un periodo unidas, con las tablas de comparación ya calculadas
+    return compare.build_comparison(_paths)
+
+
+def show_country_comparison(data_files):
+    st.header('Comparación entre Países')
+    # Un dataset por (país, periodo); si hay CSV y Parquet de la misma lista, se usa el Parquet
+    datasets = {}
+    for f in data_files:
+        key = storage.dataset_key(f)
+        if key and (key not in datasets or storage.is_dataset(f)):
+            datasets[key] = f
+    if not datasets:
+        st.write('No hay listas guardadas para comparar. Scrapea algunos países primero.')
+        return
+
+    country_names = {code: name for name, code in countries.items()}
+    available_durations = [d for d in durations if any(key[1] == d for key in datasets)]
+    duration = st.selectbox('Periodo', available_durations, format_func=lambda d: durations[d])
+    paths = sorted(f for (_, d), f in datasets.items() if d == duration)
+    comparison = load_comparison(tuple(storage.content_hash(p) for p in paths), paths)
+    import charts
+
+    codes = list(comparison['overlap'].index)
+    selected = st.multiselect('Países', codes, default=codes, format_func=lambda c: country_names.get(c, c))
+    if not selected:
+        return
+
+    # Géneros más frecuentes en los países seleccionados
+    genres = comparison['genres'][selected]
+    top_genres = genres.loc[genres.mean(axis=1).nlargest(15).index]
+    genres_long = top_genres.reset_index().melt(id_vars='Género', var_name='País', value_name='% de libros')
+    st.plotly_chart(charts.country_genre_figure(genres_long))
+
+    # Libros compartidos entre cada par de países
+    metric = st.radio('Libros compartidos', ['Número de libros', 'Índice de Jaccard'], horizontal=True)
+    matrix = comparison['overlap' if metric == 'Número de libros' else 'jaccard'].loc[selected, selected]
+    st.plotly_chart(charts.overlap_figure(matrix, metric))
+
+    # Posición de cada libro en cada país
+    lists = comparison['lists']
+    lists = lists[lists['País'].isin(selected)]
+    positions = lists.pivot_table(index='Libro', columns='País', values='Ranking', aggfunc='min', observed=True)
+    positions.insert(0, 'Países', positions.notna().sum(axis=1))
+    positions = comparison['books'][['Título', 'Autor']].join(positions, how='inner')
+    positions = positions.sort_values(['Países', 'Título'], ascending=[False, True])
+    st.subheader('Libros en Varias Listas')
+    st.dataframe(positions, hide_index=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_index():
+    # Una sola conexión al índice de búsqueda para todas las sesiones
+    return search_index.SearchIndex()
+
+
+def show_search(data_files):
+    st.header('Buscar Libros')
+    index = get_search_index()
+    # Solo se reindexan los datasets que han cambiado desde la última vez (normalmente ninguno)
+    with st.spinner('Actualizando el índice de búsqueda...'):
+        index.index_datasets(data_files, prune=True)
+        index.index_snapshots()
+    query = st.text_input('Buscar en títulos, autores, sinopsis y reseñas de todas las listas',
+                          placeholder='p. ej. dragon riders')
+    if not query:
+        return
+    results = index.search(query)
+    if results.empty:
+        st.write('No se encontró ningún libro.')
+    else:
+        st.dataframe(results, hide_index=True)
+
 
-def get_csv_files():
-    return [f for f in os.listdir() if f.endswith('.csv')]
+def get_data_files():
+    # CSV y datasets Parquet del directorio actual
+    return storage.list_datasets()
 
 # Main Streamlit app
 def main():
     st.title('Estadísticas de Goodreads')
+    view = st.sidebar.radio('Vista', ['Un dataset', 'Comparar países', 'Buscar'], horizontal=True)
 
-    # Lista de archivos CSV en el directorio
-    csv_files = get_csv_files()
+    # Lista de datasets (CSV y Parquet) en el directorio
+    data_files = get_data_files()
 
     # Sidebar para scraping de nuevos datos
     st.sidebar.header('Scraping de Libros')
     country = st.sidebar.selectbox('Selecciona país', list(countries.keys()))
 
     # Mapeo de duración
-    duration_labels = {'y': 'Últimos 12 meses', 'm': 'Este mes', 'w': 'Esta semana'}
+    duration_labels = durations
     duration_display = list(duration_labels.values())
     selected_duration_label = st.sidebar.selectbox('Selecciona duración', duration_display)
     selected_duration = [key for key, value in duration_labels.items() if value == selected_duration_label][0]
 
-    # Al hacer clic en "Scrapear y Guardar CSV"
-    if st.sidebar.button('Scrapear y Guardar CSV'):
+    incremental = st.sidebar.checkbox('Descargar solo libros nuevos', value=True,
+                                      help='Reutiliza los detalles del último scraping de esta lista si tienen menos de una semana')
+    show_metrics = st.sidebar.checkbox('Mostrar métricas del scraping', value=False,
+                                       help='Peticiones, latencias, tiempo de parseo, reintentos y libros omitidos')
+
+    # Al hacer clic en "Scrapear y Guardar"
+    if st.sidebar.button('Scrapear y Guardar'):
         try:
             with st.sidebar:
-                with st.spinner('Scrapeando datos, suele tardar alrededor de 2 minutos...'):
+                with st.spinner('Scrapeando datos, suele tardar unos segundos...'):
+                    progress_bar = st.progress(0.0)
+                    run_metrics = RunMetrics(f'{countries[country]}/{selected_duration}')
+                    metrics_box = st.empty() if show_metrics else None
+
+                    def update_progress(done, total):
+                        progress_bar.progress(done / total, text=f'{done}/{total} libros descargados')
+                        if metrics_box is not None:
+                            metrics_box.markdown(metrics_markdown(run_metrics.summary()))
+
                     # Perform the scraping and get the filename
-                    new_file_name = scrape_and_save(countries[country], selected_duration)
+                    new_file_name = scrape_and_save(countries[country], selected_duration, progress_callback=update_progress,
+                                                    incremental=incremental, metrics=run_metrics)
+                    st.session_state.scrape_report = run_metrics.report()
+                    if metrics_box is not None:
+                        metrics_box.empty()
     
                     if new_file_name:
-                        # Update the list of CSV files and check if the file exists
-                        csv_files = get_csv_files()
-                        if new_file_name in csv_files:
+                        # Update the list of data files and check if the file exists
+                        data_files = get_data_files()
+                        if new_file_name in data_files:
                             selected_file = new_file_name
                         else:
                             selected_file = None
@@ -505,6 +375,20 @@ def main():
         except Exception as e:
             st.error(f"Error: {str(e)}")
 
+    # Métricas del último scraping de la sesión
+    if show_metrics and 'scrape_report' in st.session_state:
+        report = st.session_state.scrape_report
+        st.sidebar.markdown(metrics_markdown(report['summary']))
+        st.sidebar.download_button('Descargar informe (JSON)', json.dumps(report, ensure_ascii=False, indent=2),
+                                   file_name=f"scrape_report_{report['name'].replace('/', '_')}.json",
+                                   mime='application/json')
+
+    if view == 'Comparar países':
+        show_country_comparison(get_data_files())
+        return
+    if view == 'Buscar':
+        show_search(get_data_files())
+        return
 
     # Mostrar opciones solo si no hay archivo cargado
     if 'uploaded_file' in st.session_state and st.session_state.uploaded_file is not None:
@@ -512,7 +396,7 @@ def main():
         st.sidebar.empty()  # Eliminar los componentes del sidebar para mostrar solo el archivo cargado
         
         # Leer el archivo CSV cargado
-        df = pd.read_csv(uploaded_file)
+        df = load_cached_data(storage.content_hash(uploaded_file), uploaded_file)
         st.session_state.df = df  # Guardar el DataFrame en session_state
 
         # Mostrar los insights
@@ -524,14 +408,14 @@ def main():
         "<div style='color:grey;text-align:center'><br><br> — &nbsp;&nbsp;&nbsp;o también puedes &nbsp;&nbsp;&nbsp; — \n \n<br><br></span>",
         unsafe_allow_html=True
         )
-        selected_file = st.sidebar.selectbox('Cargar un archivo CSV', [''] + csv_files)
+        selected_file = st.sidebar.selectbox('Cargar un archivo', [''] + data_files)
         uploaded_file = st.sidebar.file_uploader("Subir tu propio archivo CSV", type=["csv"])
 
         # Verificar si se ha cargado un archivo
         if uploaded_file is not None:
            st.sidebar.empty()  # Eliminar los componentes del sidebar para mostrar solo el archivo cargado
            # Leer el archivo CSV cargado
-           df = pd.read_csv(uploaded_file)
+           df = load_cached_data(storage.content_hash(uploaded_file), uploaded_file)
            st.session_state.df = df  # Guardar el DataFrame en session_state
            # Mostrar los insights
            show_main_insights(df)
@@ -539,7 +423,7 @@ def main():
 
         elif selected_file:
             # Si se ha seleccionado un archivo desde la lista
-            df = pd.read_csv(selected_file)
+            df = load_cached_data(storage.content_hash(selected_file), selected_file)
             st.session_state.df = df  # Guardar el archivo en session_state
             show_main_insights(df)
             analyze_book_reviews(df)
@@ -0,0 +1,147 @@
+"""Capa HTTP compartida para todas las peticiones a Goodreads.
+
+Reutiliza las conexiones con una única sesión, aplica timeouts explícitos,
+limita las peticiones por host y reintenta los errores transitorios con
+backoff exponencial (respetando la cabecera Retry-After).
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36'}
+
+# Timeouts (segundos) de conexión y de lectura
+connect_timeout = 5
+read_timeout = 20
+
+# Reintentos ante errores de red, 429 y 5xx
+max_retries = 4
+backoff_base = 0.5
+backoff_max = 30
+retry_statuses = {429, 500, 502, 503, 504}
+
+# Peticiones por segundo permitidas a un mismo host
+requests_per_second = 4
+pool_size = 16
+
+
+class RateLimiter:
+    # Reparte las peticiones a un mismo host con un intervalo mínimo entre ellas,
+    # compartido por todos los hilos
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+_rate_limiters = {}
+_lock = threading.Lock()
+_session = None
+
+
+def get_rate_limiter(url, rate=None):
+    host = urlparse(url).netloc
+    with _lock:
+        limiter = _rate_limiters.get(host)
+        if limiter is None or (rate is not None and limiter.interval != 1.0 / rate):
+            limiter = RateLimiter(rate or requests_per_second)
+            _rate_limiters[host] = limiter
+        return limiter
+
+
+def get_session():
+    # Sesión única con keep-alive y un pool de conexiones del tamaño del pool de hilos
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def backoff_delay(attempt):
+    # Backoff exponencial con "full jitter"
+    return random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+
+
+def retry_after_delay(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def transferred_bytes(response):
+    # Bytes recibidos por la red (comprimidos si el servidor usó gzip), no los del cuerpo ya
+    # descomprimido; si urllib3 no los conoce, los de Content-Length o, en último caso, los del cuerpo
+    try:
+        return int(response.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        pass
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, TypeError, ValueError):
+        return len(response.content)
+
+
+def get(url, rate=None, metrics=None, **kwargs):
+    # GET con límite por host, timeouts y reintentos. Devuelve la última respuesta
+    # aunque su estado sea de error; relanza la excepción si fallan todos los intentos de red.
+    # Con 'metrics' (metrics.RunMetrics) se anotan cada intento y cada reintento
+    kwargs.setdefault('timeout', (connect_timeout, read_timeout))
+    for attempt in range(max_retries + 1):
+        get_rate_limiter(url, rate).wait()
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if metrics is not None:
+                metrics.record_request(url, None, time.perf_counter() - start, 0, type(e).__name__)
+            if attempt == max_retries:
+                raise
+            reason = type(e).__name__
+            delay = backoff_delay(attempt)
+        else:
+            if metrics is not None:
+                metrics.record_request(url, response.status_code, time.perf_counter() - start,
+                                       transferred_bytes(response))
+            if response.status_code not in retry_statuses or attempt == max_retries:
+                return response
+            reason = f'HTTP {response.status_code}'
+            delay = retry_after_delay(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            else:
+                delay = min(delay, backoff_max * 2) + random.uniform(0, backoff_base)
+        if metrics is not None:
+            metrics.record_retry(url, attempt + 1, reason, delay)
+        time.sleep(delay)
@@ -0,0 +1,117 @@
+"""Diario de un scraping en curso.
+
+Cada libro descargado se añade como una línea JSON en cuanto llega, así que si
+el proceso falla o se interrumpe, la siguiente ejecución de la misma lista (o
+del mismo lote de listas) retoma el trabajo sin volver a descargar esos libros.
+Cada lista tiene su propio diario, que empieza con la fecha en que se creó; las
+entradas más antiguas que la antigüedad máxima de los detalles no se retoman.
+El diario se borra cuando el dataset se ha publicado correctamente.
+
+Dentro de un proceso (las sesiones del dashboard son hilos) cada diario lo usa
+una sola ejecución a la vez: si otra ya está scrapeando la misma lista, la
+nueva usa un diario propio y no toca el de la otra.
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+journal_prefix = '.scrape_journal_'
+
+_active = set()
+_active_lock = threading.Lock()
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class ScrapeJournal:
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.file = None
+        self.started_at = None
+
+    @property
+    def name(self):
+        # Nombre de la ejecución, que también usa su ReviewStream
+        return os.path.basename(self.path)[len(journal_prefix):-len('.jsonl')]
+
+    @classmethod
+    def for_run(cls, directory, name, max_age=None):
+        # Diario de la lista 'name' (p. ej. 'US_y') en 'directory', reservado para esta ejecución
+        # hasta release(); si otra ejecución del proceso lo tiene reservado, se usa 'name-2', 'name-3'...
+        base = os.path.join(directory or '.', journal_prefix + name)
+        with _active_lock:
+            path, n = f'{base}.jsonl', 1
+            while path in _active:
+                n += 1
+                path = f'{base}-{n}.jsonl'
+            _active.add(path)
+        return cls(path, max_age)
+
+    def release(self):
+        self.close()
+        with _active_lock:
+            _active.discard(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _expired(self, recorded_at):
+        if recorded_at is None:
+            return True
+        return self.max_age is not None and _now() - datetime.fromisoformat(recorded_at) > self.max_age
+
+    def load(self):
+        # Detalles ya descargados en ejecuciones anteriores: {href: detalles}, sin los caducados
+        details = {}
+        if not os.path.exists(self.path):
+            return details
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Última línea a medio escribir si el proceso murió mientras escribía
+                    continue
+                if 'started_at' in entry:
+                    self.started_at = entry['started_at']
+                elif not self._expired(entry.get('recorded_at') or self.started_at):
+                    details[entry['href']] = entry['details']
+        if not details:
+            # Nada que retomar: el siguiente libro empieza un diario nuevo
+            self.discard()
+        return details
+
+    def record(self, href, details):
+        line = json.dumps({'href': href, 'details': details, 'recorded_at': _now().isoformat(timespec='seconds')},
+                          ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+                if self.file.tell() == 0:
+                    self.started_at = _now().isoformat(timespec='seconds')
+                    self.file.write(json.dumps({'started_at': self.started_at}) + '\n')
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def discard(self):
+        # El dataset ya está publicado (o no había nada que retomar): el diario deja de ser necesario
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,138 @@
+"""Métricas de un scraping.
+
+Un RunMetrics recoge, desde todos los hilos de descarga, cada petición HTTP
+(latencia, estado y bytes recibidos por la red), las páginas servidas desde la caché, el tiempo de
+parseo de cada página, los reintentos y los libros descartados con su motivo.
+summary() da los totales (con las páginas por segundo) para mostrarlos mientras
+avanza el scraping y report() el informe completo que se guarda como JSON.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import atomic
+
+report_name = 'scrape_report.json'
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _timing(values):
+    # Resumen de una lista de duraciones en segundos, en milisegundos
+    if not values:
+        return {'count': 0}
+    return {'count': len(values), 'total_ms': round(sum(values) * 1000, 1),
+            'mean_ms': round(sum(values) / len(values) * 1000, 1),
+            'p50_ms': round(_percentile(values, 0.5) * 1000, 1), 'p95_ms': round(_percentile(values, 0.95) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1)}
+
+
+class RunMetrics:
+    def __init__(self, name=None):
+        self.name = name
+        self.lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.finished = None
+        self.requests = []
+        self.cache_hits = []
+        self.parses = []
+        self.retries = []
+        self.skipped = []
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.start
+
+    def record_request(self, url, status, elapsed, size, error=None):
+        # status es None si la petición falló sin respuesta (error de red)
+        with self.lock:
+            self.requests.append({'url': url, 'status': status, 'elapsed_ms': round(elapsed * 1000, 1),
+                                  'bytes': size, 'error': error})
+
+    def record_cache_hit(self, url, size):
+        with self.lock:
+            self.cache_hits.append({'url': url, 'bytes': size})
+
+    def record_parse(self, kind, elapsed):
+        with self.lock:
+            self.parses.append((kind, elapsed))
+
+    def record_retry(self, url, attempt, reason, delay):
+        with self.lock:
+            self.retries.append({'url': url, 'attempt': attempt, 'reason': reason, 'delay_s': round(delay, 2)})
+
+    def record_skip(self, item, reason):
+        with self.lock:
+            self.skipped.append({'item': item, 'reason': reason})
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        with self.lock:
+            requests = list(self.requests)
+            cache_hits = len(self.cache_hits)
+            parses = list(self.parses)
+            retries = len(self.retries)
+            skipped = len(self.skipped)
+        elapsed = self.elapsed()
+        # Páginas procesadas (descargadas o de la caché): las que se han parseado
+        pages = len(parses)
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'pages': pages,
+            'pages_per_second': round(pages / elapsed, 2) if elapsed > 0 else None,
+            'requests': len(requests),
+            'cache_hits': cache_hits,
+            'bytes': sum(r['bytes'] for r in requests),
+            'latency': _timing([r['elapsed_ms'] / 1000 for r in requests if r['status'] is not None]),
+            'parse': _timing([elapsed for _, elapsed in parses]),
+            'retries': retries,
+            'skipped': skipped,
+        }
+
+    def report(self):
+        summary = self.summary()
+        with self.lock:
+            requests = list(self.requests)
+            parses = list(self.parses)
+            retries = list(self.retries)
+            skipped = list(self.skipped)
+        parse_by_kind = {}
+        for kind, elapsed in parses:
+            parse_by_kind.setdefault(kind, []).append(elapsed)
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'summary': summary,
+            'status_codes': {str(status): count for status, count in
+                             Counter('error' if r['status'] is None else r['status'] for r in requests).items()},
+            'parse_by_kind': {kind: _timing(values) for kind, values in parse_by_kind.items()},
+            'retry_reasons': dict(Counter(r['reason'] for r in retries)),
+            'skip_reasons': dict(Counter(s['reason'] for s in skipped)),
+            'skipped': skipped,
+            'retries': retries,
+            'requests': requests,
+        }
+
+    def write_report(self, path):
+        with atomic.replacing(path) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def format_summary(summary):
+    # Resumen en una línea para el log
+    latency = summary['latency'].get('p50_ms')
+    return (f"{summary['pages']} páginas en {summary['elapsed_s']} s ({summary['pages_per_second']} páginas/s), "
+            f"{summary['requests']} peticiones, {summary['cache_hits']} desde caché, "
+            f"{summary['bytes'] / 2**20:.1f} MB, latencia p50 {latency} ms, "
+            f"{summary['retries']} reintentos, {summary['skipped']} libros omitidos")
@@ -0,0 +1,181 @@
+"""Análisis de texto de las reseñas: sentimiento con VADER y frecuencia de palabras.
+
+El análisis de un dataset completo (puntuación de cada reseña y palabras más
+frecuentes de cada libro) se calcula una vez, se guarda en disco por hash del
+contenido junto al dataset y la vista de reseñas solo tiene que leerlo.
+"""
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import atomic
+import disk_cache
+
+analysis_dir = os.path.join('.cache', 'analysis')
+
+# Tamaño máximo del directorio del análisis: al pasarlo se borra el de los datasets usados hace más tiempo
+analysis_max_bytes = 64 * 1024 * 1024
+
+# Palabras por libro que se guardan (las 20 primeras van al gráfico, todas a la nube de palabras)
+top_words = 200
+
+sentiment_labels = ['Muy positivo', 'Positivo', 'Neutral', 'Negativo', 'Muy negativo']
+
+# Puntuación en paralelo: reseñas por tarea y mínimo de reseñas para usar varios procesos
+score_chunk_size = 200
+min_parallel_texts = 1000
+
+# Palabras que no cuentan en la frecuencia de palabras
+stop_words = {
+    'and', 'if', 'the', 'i', 'to', 'of', 'a', 'in', 'for', 'on', 'is',
+    'it', 'that', 'this', 'with', 'as', 'are', 'was', 'at', 'by',
+    'an', 'be', 'not', 'or', 'but', 'from', 'my', 'you', 'your',
+    'he', 'she', 'they', 'we', 'all', 'so', 'what', 'there', 'when',
+    'where', 'who', 'which', 'how', 'just', 'like', 'about', 'more',
+    'than', 'up', 'out', 'some', 'other', 'no', 'yes', 'do', 'does',
+    'did', 'will', 'would', 'could', 'should', 'y', 'de', 'la',
+    'que', 'el', 'en', 'los', 'se', 'del', 'por', 'un', 'una',
+    'con', 'no', 'es', 'para', 'su', 'al', 'como', 'más', 'o',
+    'pero', 'fue', 'este', 'entre', 'también', 'hasta', 'hay',
+    'todo', 'esta', 'ser', 'son', 'me', 'si', 'sobre', 'mi',
+    'te', 'ya', 'muy', 'donde', 'quien', 'cuando', 'qué', 'cómo',
+    'así', 'solo', 'uno', 'dos', 'tres', 'cuatro', 'cinco',
+    'seis', 'siete', 'ocho', 'nueve', 'diez', 'otro', 'mismo',
+    'tanto', 'poco', 'mucho', 'cada', 'algunos', 'ninguna',
+    'varios', 'entre', 'tras', 'hacia', 'desde', 'durante',
+    'antes', 'después', 'porque', 'aunque', 'mientras', 'según',
+    'tal', 'cual', 'donde', 'cuando', 'por qué', 'para que',
+    'a pesar de', 'en vez de', 'en cuanto a', 'a través de',
+    '-', '.', ',', 'ha', 'han', 'las', 'le', 'lo', 'ni', 'tan',
+    'unos', 'una', 'un', 'libro', 'bastante', 'leer', 'book',
+    'it.', 'one', 'know', 'say', 'see', 'im', 'also', 'after',
+    'before', 'between', 'during', 'while', 'such', 'these',
+    'those', 'each', 'few', 'many', 'much', 'most', 'some',
+    'any', 'none', 'all', 'whole', 'part', 'half', 'each', 'every',
+    'either', 'neither', 'both', 'few', 'many', 'much', 'most',
+    'some', 'any', 'none', 'all', 'whole', 'part', 'half', 'each',
+    'every','can', 'have', 'it\'s', 'her', 'him', 'they', 'them', 'he',
+    'she' ,'she\'s', 'he\'s', 'read','reading', 'had', 'has','because',
+    'didn\'t', 'his', 'were', 'been', 'get', 'really', 'never', 'can\'t',
+    'don\'t','s', 'into'}
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer():
+    # El léxico de VADER se carga una sola vez, y VADER solo se importa cuando hace falta puntuar
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            _analyzer = SentimentIntensityAnalyzer()
+        return _analyzer
+
+
+def sentiment_labels_for(compounds):
+    # Etiqueta de cada puntuación 'compound': >= 0.7, >= 0.05, > -0.05, >= -0.7 y el resto
+    compounds = np.asarray(compounds, dtype=float)
+    return np.select([compounds >= 0.7, compounds >= 0.05, compounds > -0.05, compounds >= -0.7],
+                     sentiment_labels[:4], default=sentiment_labels[4])
+
+
+def _score_chunk(texts):
+    # Se ejecuta en los procesos del pool: cada uno carga el léxico una vez (get_analyzer)
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(text)['compound'] for text in texts]
+
+
+def _new_pool(workers):
+    # 'spawn' evita hacer fork de un proceso con hilos (el servidor de Streamlit)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=get_analyzer)
+
+
+def score_texts(texts, workers=None, chunk_size=score_chunk_size, executor=None):
+    # Puntuación 'compound' de muchos textos, repartidos por bloques en un pool de procesos
+    # (el de 'executor' si se pasa uno). Devuelve (compounds, etiquetas) como arrays de numpy
+    texts = list(texts)
+    workers = workers or os.cpu_count() or 1
+    if (executor is None and workers == 1) or len(texts) < min_parallel_texts:
+        compounds = _score_chunk(texts)
+    else:
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        if executor is not None:
+            compounds = [score for chunk in executor.map(_score_chunk, chunks) for score in chunk]
+        else:
+            with _new_pool(workers) as pool:
+                compounds = [score for chunk in pool.map(_score_chunk, chunks) for score in chunk]
+    compounds = np.asarray(compounds, dtype=float)
+    return compounds, sentiment_labels_for(compounds)
+
+
+def filter_words(texts):
+    # Palabras de los textos sin las stop words; se recorren texto a texto, sin unirlos en uno solo
+    return (word for text in texts for word in text.lower().split() if word not in stop_words)
+
+
+def build_review_analysis(batches, top_n=top_words, workers=None):
+    # batches: DataFrames con Fila, Posición y content (storage.iter_reviews). Se procesan de uno
+    # en uno, así que la memoria no depende del número de reseñas: solo se acumulan las puntuaciones
+    # y un contador de palabras por libro. Devuelve (puntuaciones por reseña, palabras por libro)
+    workers = workers or os.cpu_count() or 1
+    scores = []
+    word_counts = {}
+    executor = None
+    try:
+        for batch in batches:
+            if executor is None and workers > 1 and len(batch) >= min_parallel_texts:
+                executor = _new_pool(workers)
+            contents = batch['content'].fillna('').astype(str)
+            compounds, labels = score_texts(contents, workers, executor=executor)
+            scores.append(pd.DataFrame({'Fila': batch['Fila'].to_numpy(), 'Posición': batch['Posición'].to_numpy(),
+                                        'compound': compounds, 'Sentimiento': labels}))
+            for row, texts in contents.groupby(batch['Fila'].to_numpy()):
+                counter = word_counts.setdefault(int(row), Counter())
+                counter.update(filter_words(texts))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if scores:
+        scores = pd.concat(scores, ignore_index=True)
+    else:
+        scores = pd.DataFrame(columns=['Fila', 'Posición', 'compound', 'Sentimiento'])
+    words = pd.DataFrame([(row, word, count) for row, counter in word_counts.items()
+                          for word, count in counter.most_common(top_n)],
+                         columns=['Fila', 'Palabra', 'Frecuencia'])
+    return scores, words
+
+
+def analysis_dir_for(path):
+    # Directorio del análisis de un dataset: analysis_dir junto al dataset, para que el scraper y el
+    # dashboard lo encuentren aunque se ejecuten desde directorios distintos
+    return os.path.join(os.path.dirname(os.path.normpath(path)), analysis_dir)
+
+
+def load_review_analysis(content_hash, build_batches, directory=analysis_dir):
+    # Lee el análisis guardado para este contenido o lo calcula (build_batches() da las reseñas por lotes)
+    scores_path = os.path.join(directory, f'{content_hash}.scores.parquet')
+    words_path = os.path.join(directory, f'{content_hash}.words.parquet')
+    try:
+        scores, words = pd.read_parquet(scores_path), pd.read_parquet(words_path)
+    except FileNotFoundError:
+        pass
+    else:
+        disk_cache.touch(scores_path)
+        disk_cache.touch(words_path)
+        return scores, words
+
+    scores, words = build_review_analysis(build_batches())
+    os.makedirs(directory, exist_ok=True)
+    for df, path in ((scores, scores_path), (words, words_path)):
+        with atomic.replacing(path) as tmp_path:
+            df.to_parquet(tmp_path, index=False)
+    disk_cache.evict(directory, analysis_max_bytes, keep=[scores_path, words_path])
+    return scores, words
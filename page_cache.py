@@ -0,0 +1,174 @@
+"""Caché en disco de las páginas descargadas de Goodreads.
+
+Cada página se guarda comprimida en un fichero cuyo nombre es el hash de su URL,
+con un índice SQLite que registra ETag/Last-Modified, la fecha de descarga y el
+último acceso. Las entradas caducan tras un TTL (entonces se revalidan con una
+petición condicional) y, si la caché supera su tamaño máximo, se eliminan las
+menos usadas recientemente.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import atomic
+import http_client
+
+cache_dir = os.path.join('.cache', 'pages')
+cache_ttl = 7 * 24 * 3600
+cache_max_bytes = 512 * 1024 * 1024
+
+
+class CachedResponse:
+    # Respuesta mínima compatible con el uso que se hace de requests.Response.
+    # fetched_at: cuándo se descargó (o se revalidó) el contenido, como time.time()
+    def __init__(self, status_code, content=b'', from_cache=False, encoding='utf-8', fetched_at=None):
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+        self.encoding = encoding
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class PageCache:
+    def __init__(self, directory=cache_dir, ttl=cache_ttl, max_bytes=cache_max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), check_same_thread=False)
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+        self.db.commit()
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, url):
+        # Devuelve la entrada (con su cuerpo) o None si no está en caché
+        key = self.key(url)
+        with self.lock:
+            row = self.db.execute(
+                'SELECT etag, last_modified, fetched_at FROM pages WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._path(key), 'rb') as f:
+                    body = zlib.decompress(f.read())
+            except (OSError, zlib.error):
+                self.db.execute('DELETE FROM pages WHERE key = ?', (key,))
+                self.db.commit()
+                return None
+            self.db.execute('UPDATE pages SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.db.commit()
+        etag, last_modified, fetched_at = row
+        return {'body': body, 'etag': etag, 'last_modified': last_modified, 'fetched_at': fetched_at}
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def put(self, url, body, etag=None, last_modified=None):
+        key = self.key(url)
+        data = zlib.compress(body)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic.replacing(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, url, etag, last_modified, now, now, len(data)))
+            self.db.commit()
+            self._evict()
+
+    def refresh(self, url):
+        # La página no ha cambiado (304): se renueva su TTL
+        with self.lock:
+            self.db.execute('UPDATE pages SET fetched_at = ? WHERE key = ?', (time.time(), self.key(url)))
+            self.db.commit()
+
+    def _evict(self):
+        # LRU: borrar las entradas con acceso más antiguo hasta bajar del 90% del tamaño máximo
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        for key, size in self.db.execute('SELECT key, size FROM pages ORDER BY accessed_at').fetchall():
+            if total <= target:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self.db.execute('DELETE FROM pages WHERE key = ?', (key,))
+            total -= size
+        self.db.commit()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PageCache()
+        return _default_cache
+
+
+def set_default_cache(cache):
+    # Sustituye la caché que usa cached_get por defecto (p. ej. una vacía al grabar fixtures
+    # con replay.py) y devuelve la anterior, que puede ser None si aún no se había creado
+    global _default_cache
+    with _default_cache_lock:
+        previous, _default_cache = _default_cache, cache
+        return previous
+
+
+def cached_get(url, rate=None, cache=None, metrics=None, revalidate=False):
+    # GET que consulta primero la caché y revalida con ETag/Last-Modified cuando caduca.
+    # Con 'revalidate' se revalida aunque la entrada no haya caducado (un refresco completo)
+    cache = cache or get_default_cache()
+    entry = cache.get(url)
+    if entry is not None and cache.is_fresh(entry) and not revalidate:
+        if metrics is not None:
+            metrics.record_cache_hit(url, len(entry['body']))
+        return CachedResponse(200, entry['body'], from_cache=True, fetched_at=entry['fetched_at'])
+
+    conditional = {}
+    if entry is not None:
+        if entry['etag']:
+            conditional['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            conditional['If-Modified-Since'] = entry['last_modified']
+    response = http_client.get(url, rate=rate, metrics=metrics, headers=conditional)
+
+    if response.status_code == 304 and entry is not None:
+        cache.refresh(url)
+        return CachedResponse(200, entry['body'], from_cache=True)
+    if response.status_code == 200:
+        cache.put(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return CachedResponse(response.status_code, response.content, encoding=response.encoding)
@@ -0,0 +1,238 @@
+"""Grabación y reproducción de páginas de Goodreads para trabajar sin conexión.
+
+Al grabar se hace un scraping normal (con una caché de páginas vacía, para que
+todas las páginas pasen por la red) y cada respuesta se guarda en un directorio
+de fixtures: un fichero por página más index.json con la ruta, el estado y las
+cabeceras que usa el scraper. Al reproducir, un servidor HTTP local sirve esas
+páginas en las mismas rutas, así que basta con apuntar el scraper a él:
+
+    python replay.py record fixtures/US_y --countries US --durations y
+    python replay.py serve fixtures/US_y --port 8000 --latency 0.05
+    python scraper.py --base-url http://127.0.0.1:8000 --countries US --output-dir /tmp/salida
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import atomic
+import http_client
+import page_cache
+import scraper
+
+logger = logging.getLogger(__name__)
+
+index_name = 'index.json'
+
+# Cabeceras de la respuesta que se guardan y se devuelven al reproducir
+recorded_headers = ['Content-Type', 'Location', 'ETag', 'Last-Modified']
+
+
+def page_key(url):
+    # Ruta y query de la URL: las fixtures no dependen del host desde el que se grabaron
+    parts = urlsplit(url)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+class FixtureStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.meta = {}
+        path = os.path.join(directory, index_name)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                index = json.load(f)
+            self.pages = index['pages']
+            self.meta = {k: v for k, v in index.items() if k != 'pages'}
+
+    def _file(self, key):
+        return os.path.join(self.directory, 'pages', hashlib.sha1(key.encode('utf-8')).hexdigest() + '.html')
+
+    def put(self, url, status, body, headers=None):
+        key = page_key(url)
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic.replacing(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+        with self.lock:
+            self.pages[key] = {'file': os.path.relpath(path, self.directory), 'status': status,
+                               'headers': {k: v for k, v in (headers or {}).items() if v}}
+
+    def get(self, key):
+        # (estado, cabeceras, cuerpo) de la página o None si no se grabó
+        entry = self.pages.get(key)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+            return entry['status'], entry['headers'], f.read()
+
+    def save(self, **meta):
+        self.meta.update(meta)
+        with self.lock:
+            index = {**self.meta, 'pages': self.pages}
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic.replacing(os.path.join(self.directory, index_name)) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    def __len__(self):
+        return len(self.pages)
+
+
+class Recorder:
+    # Hook de respuesta de requests: guarda cada respuesta de la sesión compartida de http_client,
+    # incluidas las redirecciones (con su Location), para reproducirlas tal cual
+    def __init__(self, store):
+        self.store = store
+
+    def __call__(self, response, *args, **kwargs):
+        if response.status_code != 304:
+            headers = {name: response.headers.get(name) for name in recorded_headers}
+            if headers['Location']:
+                headers['Location'] = page_key(headers['Location'])
+            self.store.put(response.request.url, response.status_code, response.content, headers)
+        return response
+
+    @contextmanager
+    def installed(self):
+        hooks = http_client.get_session().hooks['response']
+        hooks.append(self)
+        try:
+            yield self
+        finally:
+            hooks.remove(self)
+
+
+def record(directory, country_codes, duration_codes=('y',), reviews=0, workers=None, rate=None):
+    # Scrapea las listas indicadas y guarda todas las páginas descargadas en 'directory'
+    store = FixtureStore(directory)
+    with tempfile.TemporaryDirectory() as tmp:
+        previous_cache = page_cache.set_default_cache(page_cache.PageCache(os.path.join(tmp, 'pages')))
+        try:
+            with Recorder(store).installed():
+                scraper.scrape_batch(country_codes, duration_codes, tmp, workers, rate, fmt='csv', reviews=reviews)
+        finally:
+            page_cache.set_default_cache(previous_cache)
+    store.save(base_url=scraper.base_url, recorded_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+               countries=list(country_codes), durations=list(duration_codes), review_limit=reviews)
+    return store
+
+
+class ReplayServer:
+    # Servidor HTTP local que sirve las páginas de un FixtureStore. 'latency' añade un retardo
+    # fijo por petición para simular la red; las rutas que no se grabaron devuelven 404 y las que
+    # se piden con el ETag grabado (If-None-Match), 304
+    def __init__(self, store, host='127.0.0.1', port=0, latency=0.0):
+        self.store = store
+        self.latency = latency
+        self.requests = 0
+        self.misses = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if replay.latency:
+                    time.sleep(replay.latency)
+                page = replay.store.get(self.path)
+                with replay.lock:
+                    replay.requests += 1
+                    if page is None:
+                        replay.misses.append(self.path)
+                status, headers, body = page or (404, {'Content-Type': 'text/html'}, b'')
+                # Petición condicional (una página de la caché que se revalida) de una página que no ha cambiado
+                if status == 200 and headers.get('ETag') and self.headers.get('If-None-Match') == headers['ETag']:
+                    status, body = 304, b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Graba páginas de Goodreads y las sirve desde un servidor local.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='scrapear las listas y guardar las páginas')
+    record_parser.add_argument('directory')
+    record_parser.add_argument('--countries', nargs='+', default=['US'])
+    record_parser.add_argument('--durations', nargs='+', default=['y'])
+    record_parser.add_argument('--review-limit', type=int, default=0,
+                               help='grabar también las páginas de reseñas hasta este número por libro')
+    record_parser.add_argument('--workers', type=int)
+    record_parser.add_argument('--rate', type=float, help='peticiones por segundo a Goodreads')
+
+    serve_parser = commands.add_parser('serve', help='servir unas páginas grabadas')
+    serve_parser.add_argument('directory')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--latency', type=float, default=0.0, help='retardo por petición (segundos)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if args.command == 'record':
+        store = record(args.directory, args.countries, args.durations, args.review_limit, args.workers, args.rate)
+        logger.info('%d páginas grabadas en %s', len(store), args.directory)
+        return 0
+
+    store = FixtureStore(args.directory)
+    if not len(store):
+        parser.error(f'no hay páginas grabadas en {args.directory}')
+    server = ReplayServer(store, args.host, args.port, args.latency)
+    logger.info('%d páginas en %s; usa: python scraper.py --base-url %s', len(store), server.url, server.url)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
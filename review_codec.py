@@ -0,0 +1,27 @@
+"""Codificación de la columna Reviews de los CSV.
+
+Las reseñas se escriben como JSON. Los CSV antiguos las guardaban como repr de
+una lista de dicts de Python; se leen con ast.literal_eval (nunca con eval).
+"""
+import ast
+import json
+
+
+def encode_reviews(reviews):
+    return json.dumps(reviews, ensure_ascii=False)
+
+
+def decode_reviews(value):
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return []
+    value = value.strip()
+    # JSON ('[{"rating": ...') o repr de Python de los CSV antiguos ("[{'rating': ...")
+    if not value.startswith("[{'"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return ast.literal_eval(value)
+
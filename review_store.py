@@ -0,0 +1,113 @@
+"""Reseñas de un dataset en un fichero Arrow mapeado en memoria, de solo lectura.
+
+La primera vez que se abre un dataset sus reseñas se escriben, lote a lote, en
+.cache/reviews/<hash>.arrow (formato IPC de Arrow sin comprimir) y se abren con
+pa.memory_map: las columnas son vistas sobre el fichero, no copias. Todas las
+sesiones del dashboard usan el mismo ReviewStore y los procesos que abren el
+mismo fichero comparten sus páginas a través de la caché del sistema operativo.
+De cada libro solo se copian las reseñas que se van a mostrar. Si el directorio
+pasa de store_max_bytes se borran los ficheros usados hace más tiempo.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow as pa
+
+import atomic
+import disk_cache
+import storage
+
+store_dir = os.path.join('.cache', 'reviews')
+
+# Tamaño máximo del directorio de almacenes: al pasarlo se borran los de los datasets usados hace más tiempo
+store_max_bytes = 256 * 1024 * 1024
+
+# Almacenes abiertos que se mantienen en memoria (uno por dataset)
+max_open_stores = 16
+
+_stores = OrderedDict()
+_lock = threading.Lock()
+
+
+class ReviewStore:
+    def __init__(self, path):
+        self.path = path
+        self.table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        # Reseñas de cada libro: 'order' agrupa las reseñas por fila del libro (en el orden del
+        # fichero) y las del libro rows[i] son order[bounds[i]:bounds[i + 1]]
+        rows = self.table.column('Fila').to_numpy()
+        self.order = np.argsort(rows, kind='stable')
+        self.rows, starts = np.unique(rows[self.order], return_index=True)
+        self.bounds = np.append(starts, len(self.order))
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def get(self, row):
+        # Reseñas del libro de la fila 'row' como lista de dicts {'rating', 'content'}, ordenadas por posición
+        i = np.searchsorted(self.rows, row)
+        if i == len(self.rows) or self.rows[i] != row:
+            return []
+        book = self.table.take(self.order[self.bounds[i]:self.bounds[i + 1]]).sort_by('Posición')
+        return [{'rating': rating, 'content': content}
+                for rating, content in zip(book.column('rating').to_pylist(), book.column('content').to_pylist())]
+
+    def iter_batches(self, batch_size=storage.review_batch_size):
+        # Todas las reseñas en DataFrames de como mucho batch_size filas, como storage.iter_reviews
+        for offset in range(0, len(self), batch_size):
+            yield self.table.slice(offset, batch_size).to_pandas()
+
+
+def write_store(batches, path):
+    # batches: DataFrames de storage.review_frame; se escriben uno a uno y se publica con un rename
+    with atomic.replacing(path) as tmp_path:
+        writer = None
+        try:
+            for batch in batches:
+                table = pa.Table.from_pandas(batch, schema=storage.review_schema, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(tmp_path, table.schema)
+                writer.write_table(table)
+            if writer is None:
+                table = pa.Table.from_pandas(storage.review_frame([]), schema=storage.review_schema,
+                                             preserve_index=False)
+                writer = pa.ipc.new_file(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    return path
+
+
+def open_store(content_hash, build_batches, directory=store_dir):
+    # Devuelve el almacén del dataset con este contenido; si no existe en disco se escribe
+    # con build_batches() (lotes de reseñas, ver storage.iter_reviews)
+    with _lock:
+        if content_hash in _stores:
+            _stores.move_to_end(content_hash)
+            return _stores[content_hash]
+    path = os.path.join(directory, f'{content_hash}.arrow')
+    # Las sesiones que abren a la vez un dataset nuevo esperan a que una sola escriba el fichero
+    with atomic.key_lock(path):
+        with _lock:
+            if content_hash in _stores:
+                return _stores[content_hash]
+        try:
+            store = ReviewStore(path)
+        except FileNotFoundError:
+            os.makedirs(directory, exist_ok=True)
+            write_store(build_batches(), path)
+            store = ReviewStore(path)
+            with _lock:
+                open_paths = [other.path for other in _stores.values()]
+            disk_cache.evict(directory, store_max_bytes, keep=open_paths + [path])
+        else:
+            disk_cache.touch(path)
+    with _lock:
+        store = _stores.setdefault(content_hash, store)
+        _stores.move_to_end(content_hash)
+        while len(_stores) > max_open_stores:
+            _stores.popitem(last=False)
+    return store
@@ -0,0 +1,58 @@
+"""Reseñas descargadas en el modo de recogida de reseñas.
+
+Cuando se recorren las páginas de reseñas de cada libro, cada página se añade
+al fichero JSONL del libro en cuanto se descarga, así que la memoria no depende
+de cuántas reseñas tenga. Los ficheros se leen línea a línea al escribir el
+dataset y se borran, como el diario, cuando el dataset se ha publicado. Cada
+ejecución (ver journal.py) tiene su propio directorio.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+stream_dir_name = '.scrape_reviews'
+
+
+class ReviewStream:
+    def __init__(self, directory):
+        self.directory = directory
+
+    @classmethod
+    def for_run(cls, directory, name):
+        # 'name': el de la ejecución, ScrapeJournal.name
+        return cls(os.path.join(directory or '.', stream_dir_name, name))
+
+    def path(self, href):
+        return os.path.join(self.directory, hashlib.sha1(href.encode('utf-8')).hexdigest() + '.jsonl')
+
+    def open(self, href):
+        # Un fichero por libro, escrito por un solo hilo; volver a descargar el libro lo sobrescribe
+        os.makedirs(self.directory, exist_ok=True)
+        return open(self.path(href), 'w', encoding='utf-8')
+
+    def write(self, f, reviews):
+        for review in reviews:
+            f.write(json.dumps(review, ensure_ascii=False) + '\n')
+        f.flush()
+
+    def has(self, href):
+        return os.path.exists(self.path(href))
+
+    def read(self, href):
+        # Reseñas del libro una a una, sin cargar el fichero entero
+        with open(self.path(href), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Última línea a medio escribir si el proceso murió mientras escribía
+                    continue
+
+    def discard(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        try:
+            # El directorio común solo se borra si no quedan reseñas de otras ejecuciones
+            os.rmdir(os.path.dirname(self.directory))
+        except OSError:
+            pass
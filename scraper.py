@@ -0,0 +1,559 @@
+"""Scraping de las listas de libros más leídos de Goodreads.
+
+No depende de Streamlit, así que puede usarse desde la app o desde la línea de
+comandos para refrescar varios países y periodos de una sola vez:
+
+    python scraper.py --countries US ES MX --durations y m
+"""
+import argparse
+import importlib.util
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from catalog import countries, durations
+import http_client
+from journal import ScrapeJournal
+from metrics import RunMetrics, format_summary, report_name
+import nlp
+import page_cache
+import review_codec
+from review_stream import ReviewStream
+import search_index
+import snapshots
+import storage
+
+logger = logging.getLogger(__name__)
+
+base_url = 'https://www.goodreads.com'
+
+# Hilos para descargar las páginas de detalle en paralelo
+max_workers = 8
+
+# Formato de salida: 'parquet' (ver storage.py) o 'csv' (formato antiguo)
+output_format = 'parquet'
+
+# Modo incremental: antigüedad máxima de los detalles de un libro antes de volver a descargarlos
+detail_max_age = timedelta(days=7)
+
+# Un scraping completo (no incremental) revalida con Goodreads las páginas que están en la caché
+# aunque no hayan caducado, para que 'scraped_at' sea de verdad la fecha del scraping
+revalidate_full_scrapes = True
+
+# Modo de recogida de reseñas: máximo de reseñas por libro recorriendo sus páginas de reseñas
+# (0 = solo las reseñas que aparecen en la página del libro)
+review_limit = 0
+
+# Parser en C (lxml) si está instalado
+html_parser = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Solo se construye el árbol de los elementos que realmente se leen
+book_page_strainer = SoupStrainer(['span', 'div', 'article'], attrs={'class': [
+    'BookPageMetadataSection__genreButton', 'FeaturedDetails', 'Formatted', 'ReviewCard']})
+book_list_strainer = SoupStrainer('table', attrs={'class': 'tableList'})
+review_page_strainer = SoupStrainer('article', attrs={'class': 'ReviewCard'})
+
+
+class ScrapeError(Exception):
+    pass
+
+
+def make_soup(content, parse_only=None, encoding=None):
+    # Acepta directamente los bytes de la respuesta; el parser decodifica sin crear una copia str
+    return BeautifulSoup(content, html_parser, parse_only=parse_only, from_encoding=encoding)
+
+
+def dataset_filename(country, duration, fmt=None):
+    # Los datasets Parquet son directorios sin extensión; los CSV conservan la suya
+    stem = f'{country}_most_read_books_{duration}'
+    return stem + '.csv' if (fmt or output_format) == 'csv' else stem
+
+
+def parse_book_page(content, encoding=None):
+    soup = make_soup(content, book_page_strainer, encoding)
+    genres = [genre.text.strip() for genre in soup.find_all('span', {'class': 'BookPageMetadataSection__genreButton'})]
+    pages_info = soup.find('div', {'class': 'FeaturedDetails'})
+    pages = None
+    publication_date = None
+    if pages_info:
+        pages_text = pages_info.find('p', {'data-testid': 'pagesFormat'})
+        if pages_text:
+            pages = int(pages_text.text.strip().split()[0])
+        pub_date_text = pages_info.find('p', {'data-testid': 'publicationInfo'})
+        if pub_date_text:
+            try:
+                publication_date = datetime.strptime(pub_date_text.text.replace('First published', '').replace('Published', '').strip(), '%B %d, %Y').strftime('%d-%m-%Y')
+            except ValueError:
+                publication_date = None
+    synopsis = soup.find('span', {'class': 'Formatted'})
+    synopsis_text = synopsis.get_text(strip=True) if synopsis else ''
+    return {
+        'genres': genres,
+        'pages': pages,
+        'publication_date': publication_date,
+        'synopsis': synopsis_text,
+        'reviews': parse_reviews(soup)
+    }
+
+
+def parse_reviews(soup):
+    reviews = []
+    reviews_list = soup.find_all('article', {'class': 'ReviewCard'})
+    for review in reviews_list:
+        rating = review.find('span', {'class': 'RatingStars RatingStars__small'})
+        review_rating = None
+        if rating:
+            review_rating = int(rating['aria-label'].split()[1])
+        review_content = review.find('span', {'class': 'Formatted'})
+        review_text = review_content.get_text(strip=True) if review_content else ''
+        reviews.append({'rating': review_rating, 'content': review_text})
+    return reviews
+
+
+def parse_review_page(content, encoding=None):
+    return parse_reviews(make_soup(content, review_page_strainer, encoding))
+
+
+def review_page_url(book_url, page):
+    return f"{base_url}{book_url.split('?')[0]}/reviews?page={page}"
+
+
+def scrape_reviews(book_url, limit, stream, rate=None, fallback=(), metrics=None, refresh=False):
+    # Recorre las páginas de reseñas del libro hasta 'limit' reseñas y escribe cada página en el
+    # stream en cuanto llega. Si no se consigue ninguna, se guardan las de la página del libro
+    # ('fallback'). Devuelve el número de reseñas guardadas. 'refresh': ver scrape_book_details
+    count = 0
+    seen_pages = set()
+    with stream.open(book_url) as f:
+        page = 1
+        try:
+            while count < limit:
+                response = page_cache.cached_get(review_page_url(book_url, page), rate=rate, metrics=metrics,
+                                                 revalidate=refresh)
+                if response.status_code != 200:
+                    if page == 1:
+                        logger.warning('Error al obtener las reseñas de %s: %s', book_url, response.status_code)
+                    break
+                start = time.perf_counter()
+                reviews = parse_review_page(response.content, response.encoding)
+                if metrics is not None:
+                    metrics.record_parse('reviews', time.perf_counter() - start)
+                # Una página vacía o repetida (la web ignora el número de página) marca el final
+                signature = hash(tuple(review['content'] for review in reviews[:3]))
+                if not reviews or signature in seen_pages:
+                    break
+                seen_pages.add(signature)
+                reviews = reviews[:limit - count]
+                stream.write(f, reviews)
+                count += len(reviews)
+                page += 1
+        except requests.RequestException as e:
+            logger.warning('No se pudo descargar la página %d de reseñas de %s: %s', page, book_url, e)
+        if count == 0:
+            fallback = list(fallback)[:limit]
+            stream.write(f, fallback)
+            count = len(fallback)
+    return count
+
+
+def scrape_book_details(book_url, rate=None, review_limit=0, stream=None, metrics=None, refresh=False):
+    # 'refresh': revalidar las páginas en caché aunque no hayan caducado
+    book_page_url = base_url + book_url
+    try:
+        # Las páginas de libros se sirven desde la caché en disco cuando es posible
+        response = page_cache.cached_get(book_page_url, rate=rate, metrics=metrics, revalidate=refresh)
+    except requests.RequestException as e:
+        logger.warning('No se pudo descargar %s: %s', book_url, e)
+        if metrics is not None:
+            metrics.record_skip(book_url, f'error de red: {type(e).__name__}')
+        return
+    if response.status_code != 200:
+        logger.warning('Error al obtener datos de %s: %s', book_url, response.status_code)
+        if metrics is not None:
+            metrics.record_skip(book_url, f'HTTP {response.status_code}')
+        return
+    start = time.perf_counter()
+    details = parse_book_page(response.content, response.encoding)
+    if metrics is not None:
+        metrics.record_parse('book', time.perf_counter() - start)
+    if review_limit and stream is not None:
+        # Las reseñas van al stream en disco, no al diccionario de detalles
+        details['review_count'] = scrape_reviews(book_url, review_limit, stream, rate, details['reviews'], metrics,
+                                                 refresh)
+        details['reviews'] = []
+    # Fecha de descarga de la página, que puede venir de la caché
+    details['scraped_at'] = datetime.fromtimestamp(response.fetched_at, timezone.utc).isoformat(timespec='seconds')
+    return details
+
+
+def scrape_book_list(country='all', duration='y', rate=None, metrics=None):
+    # Ranking de la lista (sin detalles); cada libro incluye su 'href'
+    url = f'{base_url}/book/most_read?category=all&country={country}&duration={duration}'
+    response = http_client.get(url, rate=rate, metrics=metrics)
+    if response.status_code != 200:
+        raise ScrapeError(f'Error al obtener datos: {response.status_code}')
+    start = time.perf_counter()
+    books = parse_book_list(response.content, response.encoding, metrics)
+    if metrics is not None:
+        metrics.record_parse('list', time.perf_counter() - start)
+    return books
+
+
+def parse_book_list(content, encoding=None, metrics=None):
+    soup = make_soup(content, book_list_strainer, encoding)
+    books_container = soup.find('table', {'class': 'tableList'})
+    if not books_container:
+        raise ScrapeError('No se encontraron datos en Goodreads para los parámetros especificados.')
+
+    books = []
+    for book in books_container.find_all('tr', {'itemtype': 'http://schema.org/Book'}):
+        try:
+            books.append({
+                'Ranking': int(book.find('td', {'class': 'number'}).text),
+                'Título': book.find('a', {'class': 'bookTitle'}).get_text(),
+                'Autor': book.find('a', {'class': 'authorName'}).get_text(),
+                'Calificación promedio': float(book.find('span', {'class': 'minirating'}).get_text(strip=True).split(' ')[0]),
+                'Total de calificaciones': int(book.find('span', {'class': 'minirating'}).get_text(strip=True).split(' ')[4].replace(',', '')),
+                'Número de lectores': int(book.find('span', {'class': 'greyText statistic'}).get_text(strip=True).split()[0].replace(',', '')),
+                'href': book.find('a', {'class': 'bookTitle'})['href'],
+            })
+        except AttributeError as e:
+            # Fila sin alguno de los campos esperados: se omite, pero queda anotada
+            number = book.find('td', {'class': 'number'})
+            item = f"posición {number.get_text(strip=True)}" if number else 'fila sin posición'
+            logger.warning('Libro omitido en la lista (%s): %s', item, e)
+            if metrics is not None:
+                metrics.record_skip(item, f'fila incompleta en la lista: {e}')
+            continue
+    return books
+
+
+def scrape_details(hrefs, workers=None, rate=None, progress_callback=None, journal=None, review_limit=0, stream=None,
+                   metrics=None, refresh=False):
+    # Descargar los detalles en paralelo, con un máximo de hilos y de peticiones por segundo.
+    # Devuelve {href: detalles}; los libros que fallan quedan con None. Con 'journal', los libros
+    # que ya estén en el diario no se descargan y cada libro nuevo se anota en cuanto llega.
+    # Con 'review_limit' y 'stream', las reseñas de cada libro se recorren página a página hacia el stream.
+    # Con 'refresh', las páginas en caché se revalidan aunque no hayan caducado
+    hrefs = list(dict.fromkeys(hrefs))
+    details = {}
+    if journal is not None:
+        resumed = journal.load()
+        details = {href: resumed[href] for href in hrefs if href in resumed}
+        if details:
+            logger.info('Retomando el scraping empezado el %s: %d libros ya descargados', journal.started_at, len(details))
+    pending = [href for href in hrefs if href not in details]
+    with ThreadPoolExecutor(max_workers=workers or max_workers) as executor:
+        futures = {executor.submit(scrape_book_details, href, rate, review_limit, stream, metrics, refresh): href
+                   for href in pending}
+        try:
+            for done, future in enumerate(as_completed(futures), start=len(details) + 1):
+                href = futures[future]
+                try:
+                    details[href] = future.result()
+                except Exception as e:
+                    logger.warning('No se pudieron leer los detalles de %s: %s', href, e)
+                    if metrics is not None:
+                        metrics.record_skip(href, f'error al leer los detalles: {type(e).__name__}: {e}')
+                    details[href] = None
+                if journal is not None and details[href] is not None:
+                    journal.record(href, details[href])
+                if progress_callback:
+                    progress_callback(done, len(hrefs))
+        except BaseException:
+            # Interrupción o error: no seguir descargando lo que queda en la cola
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return details
+
+
+def build_rows(books, details):
+    data = []
+    for book in sorted(books, key=lambda b: b['Ranking']):
+        book_details = details.get(book['href'])
+        if book_details is None:
+            continue
+        data.append({
+            **book,
+            'Genres': ', '.join(book_details.get('genres', [])),
+            'Páginas': book_details.get('pages', ''),
+            'Fecha de publicación': book_details.get('publication_date', ''),
+            'Synopsis': book_details.get('synopsis', ''),
+            'Reviews': book_details.get('reviews', []),
+            'scraped_at': book_details.get('scraped_at'),
+            'previous_reviews': book_details.get('previous_reviews'),
+        })
+    return data
+
+
+def load_previous_details(filename):
+    # Detalles guardados en un dataset anterior: {href: detalles}. Los CSV antiguos sin 'href' no sirven.
+    # Las reseñas no se cargan: 'previous_reviews' dice dónde están, (versión del dataset, fila del libro),
+    # y save_rows las copia por lotes al guardar
+    if not (storage.is_dataset(filename) or os.path.isfile(filename)):
+        return {}
+    # La versión publicada ahora, que el siguiente write_dataset conserva mientras se copian sus reseñas
+    source = storage.dataset_dir(filename) if storage.is_dataset(filename) else filename
+    books = storage.read_books(source, storage.book_columns + ['Genres'])
+    if 'href' not in books.columns:
+        return {}
+    details = {}
+    for row, book in enumerate(books.to_dict('records')):
+        details[book['href']] = {
+            'genres': storage.split_genres(book.get('Genres')),
+            'pages': None if pd.isna(book.get('Páginas')) else int(book['Páginas']),
+            'publication_date': None if pd.isna(book.get('Fecha de publicación')) else book['Fecha de publicación'],
+            'synopsis': '' if pd.isna(book.get('Synopsis')) else book['Synopsis'],
+            'reviews': [],
+            'previous_reviews': (source, row),
+            'scraped_at': None if pd.isna(book.get('scraped_at')) else book['scraped_at'],
+        }
+    return details
+
+
+def is_stale(details, max_age=None):
+    if not details.get('scraped_at'):
+        return True
+    scraped_at = datetime.fromisoformat(details['scraped_at'])
+    return datetime.now(timezone.utc) - scraped_at > (max_age or detail_max_age)
+
+
+def scrape_changed_details(hrefs, previous, workers=None, rate=None, progress_callback=None, max_age=None, journal=None,
+                           review_limit=0, stream=None, metrics=None):
+    # Solo descarga los libros nuevos o con detalles caducados; el resto se reutiliza de 'previous'
+    hrefs = list(dict.fromkeys(hrefs))
+    changed = [href for href in hrefs if href not in previous or is_stale(previous[href], max_age)]
+    logger.info('%d libros, %d nuevos o caducados', len(hrefs), len(changed))
+    details = {href: previous[href] for href in hrefs if href in previous}
+    for href, book_details in scrape_details(changed, workers, rate, progress_callback, journal,
+                                             review_limit, stream, metrics).items():
+        # Si la nueva descarga falla, se conserva la versión anterior
+        if book_details is not None or href not in details:
+            details[href] = book_details
+    return details
+
+
+def book_reviews(row, stream=None):
+    # Reseñas de una fila: en modo de reseñas la fila no las lleva y se leen del stream en disco
+    if not row['Reviews'] and stream is not None and row.get('href') and stream.has(row['href']):
+        return stream.read(row['href'])
+    return row['Reviews']
+
+
+def previous_review_batches(data):
+    # Reseñas de los libros reutilizados de un dataset anterior (modo incremental), con la fila
+    # que tienen ahora: se recorre cada dataset anterior una vez por lotes, sin cargarlo entero
+    sources = {}
+    for i, row in enumerate(data):
+        if row.get('previous_reviews') is not None:
+            source, previous_row = row['previous_reviews']
+            sources.setdefault(source, {})[previous_row] = i
+    for source, rows in sources.items():
+        for batch in storage.iter_reviews(source):
+            batch = batch[batch['Fila'].isin(list(rows))]
+            if len(batch):
+                batch['Fila'] = batch['Fila'].map(rows).to_numpy()
+                yield batch
+
+
+def save_rows(data, filename, stream=None):
+    if not data:
+        return None
+    df = pd.DataFrame(data).drop(columns=['previous_reviews'])
+    if filename.endswith('.csv'):
+        # En un CSV las reseñas de cada libro van en una celda, así que se leen enteras
+        previous = {}
+        for batch in previous_review_batches(data):
+            for row, rating, content in zip(batch['Fila'], batch['rating'], batch['content']):
+                previous.setdefault(int(row), []).append(
+                    {'rating': None if pd.isna(rating) else int(rating), 'content': content})
+        df['Reviews'] = [review_codec.encode_reviews(previous.get(i, []) if row.get('previous_reviews') is not None
+                                                     else list(book_reviews(row, stream)))
+                         for i, row in enumerate(data)]
+        storage.write_csv(df, filename)
+    else:
+        df = df.drop(columns=['Reviews'])
+        fresh = ((i, book_reviews(row, stream)) for i, row in enumerate(data) if row.get('previous_reviews') is None)
+        storage.write_dataset(df, filename, itertools.chain(storage.review_batches(fresh),
+                                                            previous_review_batches(data)))
+    # Precalcular el análisis de las reseñas para que el dashboard solo tenga que leerlo
+    try:
+        nlp.load_review_analysis(storage.content_hash(filename), lambda: storage.iter_reviews(filename),
+                                  nlp.analysis_dir_for(filename))
+    except Exception as e:
+        logger.warning('No se pudo precalcular el análisis de %s: %s', filename, e)
+    return filename
+
+
+def record_snapshot(directory, country, duration, data):
+    # Añade la lista al histórico de rankings (snapshots.py) junto a los datasets
+    if not data:
+        return
+    try:
+        store = snapshots.SnapshotStore(os.path.join(directory or '.', snapshots.snapshot_db))
+        try:
+            store.add_snapshot(country, duration, data)
+        finally:
+            store.close()
+    except Exception as e:
+        logger.warning('No se pudo guardar la instantánea de %s/%s: %s', country, duration, e)
+
+
+def update_search_index(directory, filename):
+    # Añade el dataset nuevo y las versiones nuevas del histórico al índice de búsqueda (search_index.py)
+    if not filename:
+        return
+    try:
+        index = search_index.SearchIndex(os.path.join(directory or '.', search_index.index_db))
+        try:
+            index.index_dataset(filename)
+            index.index_snapshots(os.path.join(directory or '.', snapshots.snapshot_db))
+        finally:
+            index.close()
+    except Exception as e:
+        logger.warning('No se pudo actualizar el índice de búsqueda con %s: %s', filename, e)
+
+
+def run_stream(directory, scrape_journal):
+    # Stream de reseñas de la ejecución del diario. Si el diario no tiene nada que retomar, se borran
+    # las reseñas que hubiera dejado una ejecución anterior interrumpida
+    stream = ReviewStream.for_run(directory, scrape_journal.name)
+    if not scrape_journal.load():
+        stream.discard()
+    return stream
+
+
+def scrape_and_save(country='all', duration='y', filename=None, workers=None, rate=None, progress_callback=None, fmt=None,
+                    incremental=False, max_age=None, reviews=None, metrics=None):
+    # reviews: máximo de reseñas por libro recorriendo sus páginas de reseñas (por defecto, review_limit).
+    # metrics: RunMetrics donde se anotan peticiones, parseos, reintentos y libros omitidos
+    if filename is None:
+        filename = dataset_filename(country, duration, fmt)
+    reviews = review_limit if reviews is None else reviews
+    if os.path.dirname(filename):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+    directory = os.path.dirname(filename)
+    try:
+        books = scrape_book_list(country, duration, rate, metrics)
+        hrefs = [book['href'] for book in books]
+        # El diario y las reseñas descargadas son de esta lista; los de otras listas no se tocan
+        with ScrapeJournal.for_run(directory, f'{country}_{duration}', max_age or detail_max_age) as scrape_journal:
+            stream = run_stream(directory, scrape_journal)
+            if incremental:
+                details = scrape_changed_details(hrefs, load_previous_details(filename), workers, rate,
+                                                 progress_callback, max_age, scrape_journal, reviews, stream, metrics)
+            else:
+                details = scrape_details(hrefs, workers, rate, progress_callback, scrape_journal, reviews, stream,
+                                         metrics, revalidate_full_scrapes)
+            data = build_rows(books, details)
+            filename = save_rows(data, filename, stream)
+            scrape_journal.discard()
+            stream.discard()
+    finally:
+        if metrics is not None:
+            metrics.finish()
+    record_snapshot(os.path.dirname(filename or ''), country, duration, data)
+    update_search_index(os.path.dirname(filename or ''), filename)
+    return filename
+
+
+def scrape_batch(country_codes, duration_codes=('y',), output_dir='.', workers=None, rate=None, progress_callback=None, fmt=None,
+                 incremental=False, max_age=None, reviews=None, metrics=None):
+    # Scrapea varias listas a la vez: los libros repetidos entre listas se descargan una sola vez.
+    # Devuelve {(país, duración): fichero o None}
+    os.makedirs(output_dir, exist_ok=True)
+    lists = {}
+    for country in country_codes:
+        for duration in duration_codes:
+            try:
+                lists[(country, duration)] = scrape_book_list(country, duration, rate, metrics)
+            except (ScrapeError, requests.RequestException) as e:
+                logger.error('Lista %s/%s: %s', country, duration, e)
+                if metrics is not None:
+                    metrics.record_skip(f'lista {country}/{duration}', str(e))
+
+    hrefs = [book['href'] for books in lists.values() for book in books]
+    logger.info('%d libros en %d listas, %d únicos', len(hrefs), len(lists), len(set(hrefs)))
+    reviews = review_limit if reviews is None else reviews
+    run_name = f"{'-'.join(country_codes)}_{'-'.join(duration_codes)}"
+    with ScrapeJournal.for_run(output_dir, run_name, max_age or detail_max_age) as scrape_journal:
+        stream = run_stream(output_dir, scrape_journal)
+        try:
+            if incremental:
+                previous = {}
+                for country, duration in lists:
+                    previous.update(load_previous_details(
+                        os.path.join(output_dir, dataset_filename(country, duration, fmt))))
+                details = scrape_changed_details(hrefs, previous, workers, rate, progress_callback, max_age,
+                                                 scrape_journal, reviews, stream, metrics)
+            else:
+                details = scrape_details(hrefs, workers, rate, progress_callback, scrape_journal, reviews, stream,
+                                         metrics, revalidate_full_scrapes)
+
+            results = {}
+            for (country, duration), books in lists.items():
+                filename = os.path.join(output_dir, dataset_filename(country, duration, fmt))
+                data = build_rows(books, details)
+                results[(country, duration)] = save_rows(data, filename, stream)
+                record_snapshot(output_dir, country, duration, data)
+                update_search_index(output_dir, results[(country, duration)])
+        finally:
+            if metrics is not None:
+                metrics.finish()
+        scrape_journal.discard()
+        stream.discard()
+    return results
+
+
+def main(argv=None):
+    global base_url
+    parser = argparse.ArgumentParser(description='Scrapea las listas de libros más leídos de Goodreads.')
+    parser.add_argument('--countries', nargs='+', default=list(countries.values()), choices=list(countries.values()),
+                        help='códigos de país (por defecto, todos)')
+    parser.add_argument('--durations', nargs='+', default=['y'], choices=list(durations),
+                        help='periodos: y (12 meses), m (mes), w (semana)')
+    parser.add_argument('--output-dir', default='.', help='directorio donde guardar los ficheros')
+    parser.add_argument('--workers', type=int, default=max_workers, help='descargas simultáneas')
+    parser.add_argument('--rate', type=float, default=http_client.requests_per_second,
+                        help='peticiones por segundo a Goodreads')
+    parser.add_argument('--format', default=output_format, choices=['parquet', 'csv'], help='formato de salida')
+    parser.add_argument('--incremental', action='store_true',
+                        help='descargar solo los libros nuevos o con detalles caducados')
+    parser.add_argument('--max-age-days', type=float, default=detail_max_age.days,
+                        help='antigüedad máxima de los detalles en modo incremental')
+    parser.add_argument('--review-limit', type=int, default=review_limit,
+                        help='recorrer las páginas de reseñas de cada libro hasta este número de reseñas '
+                             '(0 = solo las de la página del libro)')
+    parser.add_argument('--base-url', default=base_url,
+                        help='servidor del que descargar las páginas (p. ej. el de replay.py serve)')
+    parser.add_argument('--report', help='informe JSON del scraping (por defecto, '
+                                         f'{report_name} en el directorio de salida)')
+    args = parser.parse_args(argv)
+
+    base_url = args.base_url.rstrip('/')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    def log_progress(done, total):
+        if done == total or done % 25 == 0:
+            logger.info('%d/%d libros descargados', done, total)
+
+    metrics = RunMetrics('batch')
+    results = scrape_batch(args.countries, args.durations, args.output_dir, args.workers, args.rate, log_progress,
+                           args.format, args.incremental, timedelta(days=args.max_age_days), args.review_limit, metrics)
+    logger.info(format_summary(metrics.summary()))
+    logger.info('Informe: %s', metrics.write_report(args.report or os.path.join(args.output_dir, report_name)))
+    failed = [key for key, filename in results.items() if filename is None]
+    for (country, duration), filename in results.items():
+        logger.info('%s/%s -> %s', country, duration, filename or 'sin datos')
+    return 1 if failed or len(results) < len(args.countries) * len(args.durations) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
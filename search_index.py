@@ -0,0 +1,253 @@
+"""Índice de búsqueda de texto completo (SQLite FTS5) sobre todos los datasets.
+
+Indexa el título, el autor, la sinopsis y las reseñas de cada libro de cada
+dataset (un país y periodo), y las versiones de libros del histórico
+(snapshots.py), que conservan títulos y sinopsis de libros que ya no están en
+ninguna lista. El texto se tokeniza como en la frecuencia de palabras
+(nlp.filter_words: minúsculas y sin stop words) antes de guardarlo, y la
+consulta se procesa igual. Cada dataset se reindexa solo si su contenido ha
+cambiado y del histórico solo se añaden las versiones nuevas, así que el
+scraper lo actualiza al terminar cada lista sin volver a leer el resto.
+
+    python search_index.py build *_most_read_books_*
+    python search_index.py query "dragones academia"
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import nlp
+import snapshots
+import storage
+
+index_db = 'search.sqlite'
+
+# Nombre de la fuente de las versiones del histórico
+snapshot_source = 'histórico'
+
+# Peso de cada columna en la puntuación bm25: un término en el título cuenta más que en una reseña
+column_weights = (10.0, 5.0, 2.0, 1.0)
+
+# Reseñas de un libro por fila del índice: las de un libro con muchas reseñas se reparten en varias filas
+# para que al indexar solo haya en memoria las palabras de unas pocas
+reviews_per_row = 50
+
+schema = '''
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    entry_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    label TEXT NOT NULL,
+    book_key TEXT NOT NULL,
+    ranking INTEGER,
+    title TEXT,
+    author TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, author, synopsis, reviews, entry_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+'''
+
+
+def index_text(value):
+    # Palabras que se indexan de un texto: las mismas que cuentan en la frecuencia de palabras
+    if not isinstance(value, str):
+        return ''
+    return ' '.join(nlp.filter_words([value]))
+
+
+def match_query(query):
+    # Consulta FTS5: todos los términos (sin stop words), el último como prefijo para buscar mientras se escribe
+    terms = ['"' + term.replace('"', '""') + '"' for term in nlp.filter_words([query])]
+    if not terms:
+        return None
+    return ' '.join(terms) + '*'
+
+
+def source_name(path):
+    return os.path.basename(os.path.normpath(path))
+
+
+def source_label(path):
+    key = storage.dataset_key(path)
+    return f'{key[0]}/{key[1]}' if key else source_name(path)
+
+
+class SearchIndex:
+    def __init__(self, path=index_db):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(schema)
+
+    def close(self):
+        self.db.close()
+
+    def _source_hash(self, source):
+        row = self.db.execute('SELECT content_hash FROM sources WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else None
+
+    def _drop_source(self, source):
+        self.db.execute('DELETE FROM entries_fts WHERE entry_id IN (SELECT entry_id FROM entries WHERE source = ?)',
+                        (source,))
+        self.db.execute('DELETE FROM entries WHERE source = ?', (source,))
+        self.db.execute('DELETE FROM sources WHERE source = ?', (source,))
+
+    def _set_source(self, source, content_hash):
+        self.db.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)',
+                        (source, content_hash, datetime.now(timezone.utc).isoformat(timespec='seconds')))
+
+    def _add_entry(self, source, label, key, ranking, title, author):
+        title = title.strip() if isinstance(title, str) else title
+        return self.db.execute(
+            'INSERT INTO entries (source, label, book_key, ranking, title, author) VALUES (?, ?, ?, ?, ?, ?)',
+            (source, label, key, ranking, title, author)).lastrowid
+
+    def _add_text(self, entry_id, title=None, author=None, synopsis=None, reviews=''):
+        self.db.execute('INSERT INTO entries_fts (title, author, synopsis, reviews, entry_id) VALUES (?, ?, ?, ?, ?)',
+                        (index_text(title), index_text(author), index_text(synopsis), reviews, entry_id))
+
+    def index_dataset(self, path):
+        # Reindexa un dataset (CSV o Parquet) si su contenido ha cambiado. Devuelve True si se ha reindexado.
+        # Las reseñas se leen por lotes (storage.iter_reviews), que vienen libro a libro, y se escriben
+        # cada reviews_per_row reseñas: solo hay en memoria las palabras de ese grupo, no las de todo el libro
+        source = source_name(path)
+        content_hash = storage.content_hash(path)
+        with self.lock:
+            if self._source_hash(source) == content_hash:
+                return False
+        books = storage.read_books(path, ['Ranking', 'Título', 'Autor', 'Synopsis', 'href'])
+        label = source_label(path)
+        with self.lock, self.db:
+            self._drop_source(source)
+            # Por fila del libro, como las reseñas (el Ranking se repite si el CSV une varias listas)
+            pending = {}
+            for row, book in enumerate(books.to_dict('records')):
+                pending[row] = (self._add_entry(source, label, snapshots.book_key(book), int(book['Ranking']),
+                                                book.get('Título'), book.get('Autor')), book)
+            indexed = {}
+            current, words, count = None, [], 0
+
+            def flush():
+                if current in pending:
+                    entry_id, book = pending.pop(current)
+                    self._add_text(entry_id, book.get('Título'), book.get('Autor'), book.get('Synopsis'), ' '.join(words))
+                    indexed[current] = entry_id
+                elif current in indexed:
+                    # Siguientes grupos de reseñas del libro: van en otra fila de la misma entrada
+                    self._add_text(indexed[current], reviews=' '.join(words))
+
+            for batch in storage.iter_reviews(path):
+                for row, content in zip(batch['Fila'].to_numpy(), batch['content'].fillna('').astype(str)):
+                    if row != current or count == reviews_per_row:
+                        flush()
+                        current, words, count = int(row), [], 0
+                    words.extend(nlp.filter_words([content]))
+                    count += 1
+            flush()
+            for entry_id, book in pending.values():
+                self._add_text(entry_id, book.get('Título'), book.get('Autor'), book.get('Synopsis'))
+            self._set_source(source, content_hash)
+        return True
+
+    def index_datasets(self, paths, prune=False):
+        # Indexa los datasets que hayan cambiado; con prune, quita los que ya no están en 'paths'
+        indexed = [path for path in paths if self.index_dataset(path)]
+        if prune:
+            keep = {source_name(path) for path in paths} | {snapshot_source}
+            with self.lock, self.db:
+                for (source,) in self.db.execute('SELECT source FROM sources').fetchall():
+                    if source not in keep:
+                        self._drop_source(source)
+        return indexed
+
+    def index_snapshots(self, path=snapshots.snapshot_db):
+        # Añade las versiones de libros del histórico posteriores a la última indexada
+        if not os.path.exists(path):
+            return 0
+        with self.lock:
+            last = int(self._source_hash(snapshot_source) or 0)
+        history = sqlite3.connect(path)
+        try:
+            versions = history.execute(
+                'SELECT v.version_id, b.book_key, v.title, v.author, v.synopsis FROM book_versions v '
+                'JOIN books b ON b.book_id = v.book_id WHERE v.version_id > ? ORDER BY v.version_id',
+                (last,)).fetchall()
+        finally:
+            history.close()
+        if not versions:
+            return 0
+        with self.lock, self.db:
+            for version_id, key, title, author, synopsis in versions:
+                self._add_text(self._add_entry(snapshot_source, snapshot_source, key, None, title, author),
+                               title, author, synopsis)
+            self._set_source(snapshot_source, str(versions[-1][0]))
+        return len(versions)
+
+    def search(self, query, limit=20):
+        # Libros que contienen todos los términos, del más relevante al menos; un libro que está
+        # en varias listas (o en el histórico) aparece una vez con todas ellas
+        match = match_query(query)
+        columns = ['Título', 'Autor', 'Listas', 'Coincidencia', 'Puntuación']
+        if match is None:
+            return pd.DataFrame(columns=columns)
+        # El fragmento (snippet) solo se calcula para los libros que se devuelven
+        sql = f'''
+            WITH hits AS MATERIALIZED (
+                SELECT rowid, entry_id, bm25(entries_fts, {', '.join(map(str, column_weights))}) AS score
+                FROM entries_fts WHERE entries_fts MATCH :match
+            ),
+            best AS MATERIALIZED (
+                SELECT e.title, e.author, group_concat(DISTINCT e.label) AS labels, h.rowid AS hit, MIN(h.score) AS score
+                FROM hits h JOIN entries e ON e.entry_id = h.entry_id
+                GROUP BY e.book_key
+                ORDER BY score
+                LIMIT :limit
+            )
+            SELECT b.title, b.author, b.labels, snippet(entries_fts, -1, '**', '**', '…', 12), b.score
+            FROM best b JOIN entries_fts ON entries_fts.rowid = b.hit
+            WHERE entries_fts MATCH :match
+            ORDER BY b.score'''
+        with self.lock:
+            rows = self.db.execute(sql, {'match': match, 'limit': limit}).fetchall()
+        results = pd.DataFrame(rows, columns=columns)
+        results['Puntuación'] = -results['Puntuación'].round(2)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Índice de búsqueda de libros y reseñas.')
+    parser.add_argument('--db', default=index_db)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='indexar datasets (por defecto, todos los del directorio)')
+    build_parser.add_argument('paths', nargs='*')
+    build_parser.add_argument('--snapshots', default=snapshots.snapshot_db, help='histórico de rankings')
+    query_parser = commands.add_parser('query', help='buscar en el índice')
+    query_parser.add_argument('query')
+    query_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.db)
+    try:
+        if args.command == 'build':
+            for path in args.paths or storage.list_datasets():
+                print(f"{path}: {'indexado' if index.index_dataset(path) else 'sin cambios'}")
+            print(f'{index.index_snapshots(args.snapshots)} versiones nuevas del histórico')
+        else:
+            with pd.option_context('display.width', 200, 'display.max_colwidth', 80):
+                print(index.search(args.query, args.limit).to_string(index=False))
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
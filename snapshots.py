@@ -0,0 +1,207 @@
+"""Histórico de rankings en SQLite.
+
+Cada scraping añade una instantánea de la lista (país, periodo, fecha) sin
+borrar las anteriores. Los datos de cada libro que apenas cambian (título,
+autor, géneros, páginas, sinopsis...) se guardan una sola vez por versión;
+en cada instantánea solo se guarda lo que varía: posición, calificaciones y
+número de lectores. La tabla de rankings tiene como clave
+(país, periodo, fecha, libro), así que las consultas por rango de fechas
+leen solo las filas necesarias. Un libro se identifica por su título y autor
+normalizados, que tienen tanto los CSV antiguos como los datasets nuevos, y
+su href se guarda como un dato más.
+
+    python snapshots.py import US_most_read_books_y --date 2025-06-12
+    python snapshots.py history US y --start 2025-01-01
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+
+import pandas as pd
+
+import storage
+
+snapshot_db = 'snapshots.sqlite'
+
+# Columnas que identifican la versión de los datos de un libro
+version_columns = ['Título', 'Autor', 'Genres', 'Páginas', 'Fecha de publicación', 'Synopsis']
+
+schema = '''
+CREATE TABLE IF NOT EXISTS books (
+    book_id INTEGER PRIMARY KEY,
+    book_key TEXT NOT NULL UNIQUE,
+    href TEXT
+);
+CREATE TABLE IF NOT EXISTS book_versions (
+    version_id INTEGER PRIMARY KEY,
+    book_id INTEGER NOT NULL REFERENCES books (book_id),
+    content_hash TEXT NOT NULL,
+    title TEXT,
+    author TEXT,
+    genres TEXT,
+    pages INTEGER,
+    publication_date TEXT,
+    synopsis TEXT,
+    UNIQUE (book_id, content_hash)
+);
+CREATE TABLE IF NOT EXISTS rankings (
+    country TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    scraped_on TEXT NOT NULL,
+    book_id INTEGER NOT NULL REFERENCES books (book_id),
+    version_id INTEGER NOT NULL REFERENCES book_versions (version_id),
+    ranking INTEGER NOT NULL,
+    avg_rating REAL,
+    total_ratings INTEGER,
+    readers INTEGER,
+    PRIMARY KEY (country, duration, scraped_on, book_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rankings_book ON rankings (book_id, scraped_on);
+'''
+
+
+def _normalize(value):
+    if not isinstance(value, str):
+        return ''
+    return ' '.join(value.split()).casefold()
+
+
+def book_key(book):
+    # Título + autor normalizados (minúsculas y espacios simples): los CSV antiguos no tienen href,
+    # así que es la única clave que coincide entre un CSV importado y un scraping posterior
+    return f"{_normalize(book.get('Título'))}|{_normalize(book.get('Autor'))}"
+
+
+def _clean(value):
+    if value is None or (not isinstance(value, (list, dict)) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+class SnapshotStore:
+    def __init__(self, path=snapshot_db):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(schema)
+
+    def close(self):
+        self.db.close()
+
+    def _book_id(self, key, href=None):
+        self.db.execute('INSERT OR IGNORE INTO books (book_key) VALUES (?)', (key,))
+        book_id = self.db.execute('SELECT book_id FROM books WHERE book_key = ?', (key,)).fetchone()[0]
+        if isinstance(href, str) and href:
+            self.db.execute('UPDATE books SET href = ? WHERE book_id = ?', (href, book_id))
+        return book_id
+
+    def _version_id(self, book_id, book):
+        values = [_clean(book.get(column)) for column in version_columns]
+        if isinstance(values[2], list):
+            values[2] = ', '.join(values[2])
+        if values[0] is not None:
+            values[0] = str(values[0]).strip()
+        content_hash = hashlib.sha1(json.dumps(values, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+        self.db.execute(
+            'INSERT OR IGNORE INTO book_versions (book_id, content_hash, title, author, genres, pages, publication_date, synopsis) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (book_id, content_hash, *values))
+        return self.db.execute('SELECT version_id FROM book_versions WHERE book_id = ? AND content_hash = ?',
+                               (book_id, content_hash)).fetchone()[0]
+
+    def add_snapshot(self, country, duration, books, scraped_on=None):
+        # books: DataFrame o lista de dicts con las columnas del dataset. Repetir el mismo día sustituye la instantánea
+        if isinstance(books, pd.DataFrame):
+            books = books.to_dict('records')
+        scraped_on = str(scraped_on or datetime.now(timezone.utc).date())
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM rankings WHERE country = ? AND duration = ? AND scraped_on = ?',
+                            (country, duration, scraped_on))
+            for book in books:
+                book_id = self._book_id(book_key(book), book.get('href'))
+                self.db.execute(
+                    'INSERT OR REPLACE INTO rankings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (country, duration, scraped_on, book_id, self._version_id(book_id, book),
+                     int(book['Ranking']), _clean(book.get('Calificación promedio')),
+                     _clean(book.get('Total de calificaciones')), _clean(book.get('Número de lectores'))))
+        return scraped_on
+
+    def snapshot_dates(self, country, duration):
+        rows = self.db.execute('SELECT DISTINCT scraped_on FROM rankings WHERE country = ? AND duration = ? '
+                               'ORDER BY scraped_on', (country, duration)).fetchall()
+        return [row[0] for row in rows]
+
+    def history(self, country, duration, start=None, end=None, book=None):
+        # Serie temporal de posición y lectores de cada libro entre dos fechas (incluidas)
+        query = '''
+            SELECT r.scraped_on AS "Fecha", b.book_key AS "Libro", b.href AS "href", v.title AS "Título", v.author AS "Autor",
+                   r.ranking AS "Ranking", r.avg_rating AS "Calificación promedio",
+                   r.total_ratings AS "Total de calificaciones", r.readers AS "Número de lectores"
+            FROM rankings r
+            JOIN books b ON b.book_id = r.book_id
+            JOIN book_versions v ON v.version_id = r.version_id
+            WHERE r.country = ? AND r.duration = ? AND r.scraped_on BETWEEN ? AND ?'''
+        params = [country, duration, str(start or '0000-00-00'), str(end or '9999-99-99')]
+        if book is not None:
+            query += ' AND b.book_key = ?'
+            params.append(book)
+        query += ' ORDER BY r.scraped_on, r.ranking'
+        return pd.read_sql_query(query, self.db, params=params)
+
+    def movement(self, country, duration, start=None, end=None):
+        # Cambio de posición y crecimiento de lectores entre la primera y la última instantánea del rango
+        history = self.history(country, duration, start, end)
+        if history.empty:
+            return history
+        grouped = history.groupby('Libro', sort=False)
+        first = grouped.first()
+        last = grouped.last()
+        result = last[['Título', 'Autor', 'href', 'Ranking', 'Número de lectores']].copy()
+        result['Primera fecha'] = first['Fecha']
+        result['Última fecha'] = last['Fecha']
+        result['Cambio de posición'] = first['Ranking'] - last['Ranking']
+        result['Nuevos lectores'] = last['Número de lectores'] - first['Número de lectores']
+        return result.reset_index().sort_values('Ranking')
+
+
+def import_dataset(store, path, country=None, duration=None, scraped_on=None):
+    # País, periodo y fecha se deducen del nombre y de la fecha de modificación si no se indican
+    key = storage.dataset_key(path) or (os.path.splitext(os.path.basename(os.path.normpath(path)))[0], 'y')
+    country = country or key[0]
+    duration = duration or key[1]
+    if scraped_on is None:
+        scraped_on = date.fromtimestamp(os.path.getmtime(path)).isoformat()
+    return store.add_snapshot(country, duration, storage.read_books(path), scraped_on)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Histórico de rankings de Goodreads.')
+    parser.add_argument('--db', default=snapshot_db)
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help='añadir datasets existentes al histórico')
+    import_parser.add_argument('paths', nargs='+')
+    import_parser.add_argument('--date', help='fecha de la instantánea (AAAA-MM-DD)')
+    history_parser = commands.add_parser('history', help='evolución de una lista')
+    history_parser.add_argument('country')
+    history_parser.add_argument('duration')
+    history_parser.add_argument('--start')
+    history_parser.add_argument('--end')
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.db)
+    if args.command == 'import':
+        for path in args.paths:
+            print(f'{path} -> {import_dataset(store, path, scraped_on=args.date)}')
+    else:
+        with pd.option_context('display.width', 200, 'display.max_rows', 200):
+            print(store.movement(args.country, args.duration, args.start, args.end).to_string(index=False))
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
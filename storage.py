@@ -0,0 +1,297 @@
+"""Almacenamiento columnar (Parquet) de los datasets de libros.
+
+Cada dataset es un directorio con tres tablas normalizadas:
+
+    books.parquet    una fila por libro (sin géneros ni reseñas)
+    genres.parquet   Fila, Posición, Género
+    reviews.parquet  Fila, Posición, rating, content
+
+Así cada vista lee solo las columnas que necesita. 'Fila' es la posición del
+libro en books.parquet y no su Ranking, que se repite cuando una tabla une
+varias listas o instantáneas.
+
+Las tablas están en un subdirectorio por versión (v-...) y el fichero CURRENT
+indica cuál es la publicada. Cada escritura crea una versión nueva y la publica
+sustituyendo CURRENT con os.replace, así que un lector siempre encuentra el
+dataset completo, el anterior o el nuevo. Se conserva también la versión
+anterior, que puede estar leyendo otra sesión. Los CSV antiguos (géneros separados por comas y
+reseñas guardadas como repr de una lista de dicts) se siguen pudiendo leer, y
+se pueden convertir con:
+
+    python storage.py US_most_read_books_y.csv
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import atomic
+import review_codec
+
+book_columns = ['Ranking', 'Título', 'Autor', 'Calificación promedio', 'Total de calificaciones',
+                'Número de lectores', 'Páginas', 'Fecha de publicación', 'Synopsis', 'href', 'scraped_at']
+
+tables = ['books', 'genres', 'reviews']
+
+# Nombres de columnas de versiones anteriores del scraper
+legacy_column_names = {'Pages': 'Páginas'}
+
+# Columnas de texto que se repiten entre libros e instantáneas; en memoria se guardan como categorías
+categorical_columns = ['Título', 'Autor', 'Genres']
+
+# Reseñas por lote al escribir y leer reviews.parquet (cada lote escrito es un grupo de filas)
+review_batch_size = 1000
+
+review_schema = pa.schema([('Fila', pa.int64()), ('Posición', pa.int64()),
+                           ('rating', pa.int64()), ('content', pa.string())])
+
+# Fichero con el nombre de la versión publicada y prefijo de los directorios de versiones
+current_name = 'CURRENT'
+version_prefix = 'v-'
+
+_hashes = {}
+
+
+def dataset_dir(path):
+    # Directorio con las tablas de la versión publicada; un directorio de versión es ya 'path'
+    try:
+        with open(os.path.join(path, current_name), encoding='utf-8') as f:
+            return os.path.join(path, f.read().strip())
+    except OSError:
+        return path
+
+
+def is_dataset(path):
+    return isinstance(path, str) and os.path.isfile(os.path.join(dataset_dir(path), 'books.parquet'))
+
+
+def list_datasets(directory='.'):
+    # CSV antiguos y directorios de datasets Parquet, sin los temporales de una escritura
+    return sorted(f for f in os.listdir(directory)
+                  if not f.startswith('.') and (f.endswith('.csv') or is_dataset(os.path.join(directory, f))))
+
+
+def content_hash(source):
+    # Hash del contenido de un CSV, de un dataset Parquet o de un archivo subido.
+    # Para ficheros en disco se recuerda mientras no cambien su tamaño ni su fecha
+    if hasattr(source, 'getvalue'):
+        return hashlib.sha256(source.getvalue()).hexdigest()
+    if is_dataset(source):
+        source = dataset_dir(source)
+        paths = [os.path.join(source, f'{table}.parquet') for table in tables]
+    else:
+        paths = [source]
+    stamp = tuple((p, os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths)
+    if stamp not in _hashes:
+        digest = hashlib.sha256()
+        for p in paths:
+            with open(p, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+        _hashes[stamp] = digest.hexdigest()
+    return _hashes[stamp]
+
+
+def dataset_key(path):
+    # (país, periodo) a partir de un nombre como 'US_most_read_books_y' o 'US_most_read_books_y.csv'
+    stem = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    parts = stem.split('_most_read_books_')
+    if len(parts) != 2:
+        return None
+    return parts[0], parts[1]
+
+
+def split_genres(value):
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str):
+        return []
+    return [genre.strip() for genre in value.split(',') if genre.strip()]
+
+
+def review_frame(rows):
+    # rows: tuplas (Fila, Posición, rating, content)
+    reviews = pd.DataFrame(rows, columns=['Fila', 'Posición', 'rating', 'content'])
+    reviews['rating'] = reviews['rating'].astype('Int64')
+    return reviews
+
+
+def review_batches(books, batch_size=review_batch_size):
+    # Lotes de como mucho batch_size reseñas a partir de pares (fila del libro, reseñas del libro);
+    # las reseñas de cada libro pueden ser un iterador que se va leyendo de disco
+    rows = []
+    for row, reviews in books:
+        for position, review in enumerate(reviews):
+            rows.append((row, position, review.get('rating'), review.get('content', '')))
+            if len(rows) >= batch_size:
+                yield review_frame(rows)
+                rows = []
+    if rows:
+        yield review_frame(rows)
+
+
+def write_reviews(batches, path):
+    # Escribe los lotes uno a uno como grupos de filas; nunca están todas las reseñas en memoria
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pandas(batch, schema=review_schema, preserve_index=False)
+            if writer is None:
+                # El esquema del primer lote lleva los metadatos de pandas (rating como Int64)
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        review_frame([]).to_parquet(path, index=False, compression='zstd')
+
+
+def write_dataset(df, path, reviews=None):
+    # Normaliza un DataFrame "ancho" (Genres y Reviews por libro) en las tres tablas.
+    # 'reviews' (lotes de review_frame) sustituye a la columna Reviews cuando las reseñas
+    # vienen de un stream en disco
+    df = df.rename(columns=legacy_column_names)
+    books = df[[c for c in book_columns if c in df.columns]].copy()
+    if 'Páginas' in books.columns:
+        books['Páginas'] = pd.to_numeric(books['Páginas'], errors='coerce').astype('Int64')
+
+    genres = pd.DataFrame(
+        [(row, position, genre)
+         for row, value in enumerate(df.get('Genres', pd.Series(index=df.index, dtype=object)))
+         for position, genre in enumerate(split_genres(value))],
+        columns=['Fila', 'Posición', 'Género'])
+    genres['Género'] = genres['Género'].astype('category')
+
+    if reviews is None:
+        column = df.get('Reviews', pd.Series(index=df.index, dtype=object))
+        reviews = review_batches(enumerate(column.map(review_codec.decode_reviews)))
+
+    os.makedirs(path, exist_ok=True)
+    # Un solo hilo escribe a la vez cada dataset: la limpieza no debe borrar la versión que escribe otro
+    with atomic.key_lock(os.path.abspath(path)):
+        version = tempfile.mkdtemp(dir=path, prefix=version_prefix)
+        try:
+            books.to_parquet(os.path.join(version, 'books.parquet'), index=False, compression='zstd')
+            genres.to_parquet(os.path.join(version, 'genres.parquet'), index=False, compression='zstd')
+            write_reviews(reviews, os.path.join(version, 'reviews.parquet'))
+        except BaseException:
+            shutil.rmtree(version, ignore_errors=True)
+            raise
+        previous = dataset_dir(path)
+        _publish_version(path, os.path.basename(version))
+        _remove_old_versions(path, {os.path.basename(version), os.path.basename(previous)})
+    return path
+
+
+def _publish_version(path, version):
+    with atomic.replacing(os.path.join(path, current_name)) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(version)
+
+
+def _remove_old_versions(path, keep):
+    # Versiones que ya no se leen y, si el dataset era de antes de las versiones y sus tablas sueltas
+    # ya no son la versión anterior, esas tablas
+    for entry in os.listdir(path):
+        if entry.startswith(version_prefix) and entry not in keep:
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+    if os.path.basename(path) not in keep:
+        for table in tables:
+            try:
+                os.remove(os.path.join(path, f'{table}.parquet'))
+            except FileNotFoundError:
+                pass
+
+
+def write_csv(df, path):
+    with atomic.replacing(path) as tmp_path:
+        df.to_csv(tmp_path, index=False)
+    return path
+
+
+def read_legacy_csv(source, columns=None):
+    df = pd.read_csv(source)
+    df = df.rename(columns=legacy_column_names)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def read_genres(path):
+    return pd.read_parquet(os.path.join(dataset_dir(path), 'genres.parquet'))
+
+
+def read_books(path, columns=None):
+    # Tabla de libros con la columna 'Genres' (géneros separados por comas), como en los CSV
+    if not is_dataset(path):
+        return read_legacy_csv(path, columns)
+    # Todas las tablas de la misma versión, aunque mientras tanto se publique otra
+    path = dataset_dir(path)
+    books_path = os.path.join(path, 'books.parquet')
+    # Como en los CSV, las columnas pedidas que no tiene el dataset (p. ej. href en uno convertido) se omiten
+    available = pq.read_schema(books_path).names
+    book_cols = None if columns is None else ['Ranking'] + [c for c in columns if c in available and c != 'Ranking']
+    books = pd.read_parquet(books_path, columns=book_cols)
+    if columns is None or 'Genres' in columns:
+        genres = read_genres(path).sort_values(['Fila', 'Posición'])
+        joined = genres.groupby('Fila', observed=True)['Género'].agg(lambda g: ', '.join(g.astype(str)))
+        books['Genres'] = joined.reindex(range(len(books)), fill_value='').to_numpy()
+    return books
+
+
+def compact_books(df):
+    # Cada título, autor o lista de géneros distinto se guarda una sola vez (categoría) y las
+    # filas solo llevan su código; con muchas instantáneas del mismo libro la tabla ocupa mucho menos
+    df = df.copy()
+    for column in categorical_columns:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def read_reviews_index(path):
+    # Todas las reseñas del dataset agrupadas por libro: {fila del libro: [reseñas]}
+    if not is_dataset(path):
+        df = read_legacy_csv(path, ['Reviews'])
+        return dict(enumerate(df['Reviews'].map(review_codec.decode_reviews)))
+    index = {}
+    for batch in iter_reviews(path):
+        for row, rating, content in zip(batch['Fila'], batch['rating'], batch['content']):
+            index.setdefault(int(row), []).append(
+                {'rating': None if pd.isna(rating) else int(rating), 'content': content})
+    return index
+
+
+def iter_reviews(path, batch_size=review_batch_size):
+    # Todas las reseñas del dataset en lotes de como mucho batch_size filas (Fila, Posición, rating, content)
+    if not is_dataset(path):
+        df = read_legacy_csv(path, ['Reviews'])
+        yield from review_batches(enumerate(df['Reviews'].map(review_codec.decode_reviews)), batch_size)
+        return
+    reviews = pq.ParquetFile(os.path.join(dataset_dir(path), 'reviews.parquet'))
+    for batch in reviews.iter_batches(batch_size):
+        yield batch.to_pandas()
+
+
+def convert_csv(csv_path, path=None):
+    if path is None:
+        path = os.path.splitext(csv_path)[0]
+    return write_dataset(read_legacy_csv(csv_path), path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convierte CSV antiguos al formato Parquet.')
+    parser.add_argument('csv_files', nargs='+')
+    args = parser.parse_args(argv)
+    for csv_path in args.csv_files:
+        print(f'{csv_path} -> {convert_csv(csv_path)}')
+
+
+if __name__ == '__main__':
+    main()
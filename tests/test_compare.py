@@ -0,0 +1,24 @@
+"""Los CSV antiguos (sin href) y los datasets scrapeados (con href) comparten la clave de cada libro."""
+import os
+
+import pandas as pd
+
+import compare
+import storage
+from conftest import repo_dir
+
+
+def test_overlap_counts_books_shared_by_a_csv_and_a_scraped_dataset(tmp_path):
+    us = os.path.join(repo_dir, 'US_most_read_books_y.csv')
+    books = pd.read_csv(us).head(10)
+    # Otro país scrapeado desde la app: la mitad de los libros de EE. UU., con href
+    scraped = books.head(5).copy()
+    scraped['href'] = [f'/book/show/{i}' for i in range(len(scraped))]
+    es = str(tmp_path / 'ES_most_read_books_y')
+    storage.write_dataset(scraped, es)
+
+    lists = compare.load_lists([us, es])
+    overlap = compare.overlap_matrix(lists)
+    assert overlap.loc['US', 'ES'] == 5
+    assert compare.overlap_matrix(lists, relative=True).loc['US', 'ES'] == round(5 / 50, 2)
+    assert (compare.unique_books(lists)['Países'] == 2).sum() == 5
@@ -0,0 +1,39 @@
+"""Las cachés derivadas de los datasets no crecen sin límite: se borran los ficheros usados hace más tiempo."""
+import os
+
+import disk_cache
+import review_store
+import storage
+
+
+def write(path, size, used_at):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (used_at, used_at))
+
+
+def test_evict_removes_least_recently_used_files_first(tmp_path):
+    for i in range(5):
+        write(tmp_path / f'{i}.arrow', 100, 1000 + i)
+    write(tmp_path / '.4.arrow.abc.tmp', 100, 0)
+    disk_cache.touch(str(tmp_path / '0.arrow'))
+
+    disk_cache.evict(str(tmp_path), 350, keep=[str(tmp_path / '1.arrow')])
+    # Sin contar el temporal, de 500 bytes hay que bajar a 315: se borran 2 y 3 (el 1 se conserva)
+    assert sorted(os.listdir(tmp_path)) == ['.4.arrow.abc.tmp', '0.arrow', '1.arrow', '4.arrow']
+
+
+def test_open_store_evicts_stores_of_other_datasets(tmp_path, monkeypatch):
+    def batches():
+        return storage.review_batches([(0, [{'rating': 5, 'content': 'x' * 1000}])])
+
+    monkeypatch.setattr(review_store, '_stores', review_store.OrderedDict())
+    first = review_store.open_store('first', batches, str(tmp_path))
+    # Un almacén que ya no está abierto en el proceso se puede borrar; uno abierto no
+    review_store._stores.clear()
+    monkeypatch.setattr(review_store, 'store_max_bytes', os.path.getsize(first.path))
+    os.utime(first.path, (0, 0))
+    second = review_store.open_store('second', batches, str(tmp_path))
+
+    assert not os.path.exists(first.path)
+    assert second.get(0)[0]['rating'] == 5
@@ -0,0 +1,108 @@
+"""Reintentos de http_client contra replay.ReplayServer: Retry-After, backoff y límite de intentos.
+
+time.sleep se sustituye por uno que anota la espera, así que las pruebas no esperan de verdad.
+"""
+import socket
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+import http_client
+import replay
+from metrics import RunMetrics
+
+url_path = '/book/show/1'
+
+
+@pytest.fixture
+def server(tmp_path):
+    store = replay.FixtureStore(str(tmp_path))
+    with replay.ReplayServer(store) as server:
+        yield server
+
+
+class Sleeps(list):
+    # Esperas de los reintentos; 'then' (si se indica) se ejecuta en cada una, p. ej. para cambiar la página
+    then = None
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = Sleeps()
+
+    def sleep(delay):
+        delays.append(delay)
+        if delays.then is not None:
+            delays.then()
+
+    monkeypatch.setattr(http_client.time, 'sleep', sleep)
+    # Sin el limitador de peticiones por host, todas las esperas son de reintentos
+    monkeypatch.setattr(http_client.RateLimiter, 'wait', lambda self: None)
+    return delays
+
+
+def get(server, metrics=None):
+    return http_client.get(server.url + url_path, metrics=metrics)
+
+
+def test_retry_after_seconds_is_honoured_before_retrying(server, sleeps):
+    server.store.put(url_path, 429, b'', {'Retry-After': '7'})
+    sleeps.then = lambda: server.store.put(url_path, 200, b'ok')
+
+    response = get(server)
+    assert response.status_code == 200 and response.content == b'ok'
+    assert server.requests == 2
+    assert 7 <= sleeps[0] <= 7 + http_client.backoff_base
+
+
+def test_retry_after_http_date_is_honoured(server, sleeps):
+    when = datetime.now(timezone.utc) + timedelta(seconds=20)
+    server.store.put(url_path, 503, b'', {'Retry-After': format_datetime(when, usegmt=True)})
+    sleeps.then = lambda: server.store.put(url_path, 200, b'ok')
+
+    assert get(server).status_code == 200
+    assert 18 <= sleeps[0] <= 20 + http_client.backoff_base
+
+
+def test_retry_after_is_capped(server, sleeps):
+    server.store.put(url_path, 429, b'', {'Retry-After': '3600'})
+    sleeps.then = lambda: server.store.put(url_path, 200, b'ok')
+
+    get(server)
+    assert sleeps[0] <= http_client.backoff_max * 2 + http_client.backoff_base
+
+
+def test_gives_up_after_max_retries_and_returns_the_last_response(server, sleeps, monkeypatch):
+    monkeypatch.setattr(http_client, 'max_retries', 2)
+    server.store.put(url_path, 503, b'')
+    metrics = RunMetrics()
+
+    response = get(server, metrics)
+    assert response.status_code == 503
+    assert server.requests == 3
+    assert len(sleeps) == 2
+    # Backoff exponencial con jitter: cada espera como mucho backoff_base * 2^intento
+    assert all(0 <= delay <= http_client.backoff_base * 2 ** attempt for attempt, delay in enumerate(sleeps))
+    assert metrics.summary()['retries'] == 2
+
+
+def test_client_errors_are_not_retried(server, sleeps):
+    server.store.put(url_path, 404, b'')
+
+    assert get(server).status_code == 404
+    assert server.requests == 1 and not sleeps
+
+
+def test_connection_errors_are_retried_then_raised(sleeps, monkeypatch):
+    monkeypatch.setattr(http_client, 'max_retries', 1)
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    metrics = RunMetrics()
+
+    with pytest.raises(requests.ConnectionError):
+        http_client.get(f'http://127.0.0.1:{port}/', metrics=metrics)
+    assert len(sleeps) == 1
+    assert metrics.summary()['retries'] == 1
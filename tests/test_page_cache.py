@@ -0,0 +1,77 @@
+"""Caché de páginas contra replay.ReplayServer: TTL, revalidación con ETag (304) y expulsión LRU."""
+import os
+
+import pytest
+
+import page_cache
+import replay
+
+url_path = '/book/show/1'
+
+
+@pytest.fixture
+def server(tmp_path):
+    store = replay.FixtureStore(str(tmp_path / 'fixtures'))
+    store.put(url_path, 200, b'<html>v1</html>', {'ETag': '"v1"'})
+    with replay.ReplayServer(store) as server:
+        yield server
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return page_cache.PageCache(str(tmp_path / 'pages'), ttl=3600)
+
+
+def get(server, cache, **kwargs):
+    return page_cache.cached_get(server.url + url_path, rate=1e6, cache=cache, **kwargs)
+
+
+def test_fresh_pages_are_served_without_a_request(server, cache):
+    first = get(server, cache)
+    second = get(server, cache)
+    assert not first.from_cache and second.from_cache
+    assert second.content == b'<html>v1</html>'
+    assert second.fetched_at == pytest.approx(first.fetched_at, abs=1)
+    assert server.requests == 1
+
+
+def test_expired_page_is_revalidated_and_a_304_renews_its_ttl(server, cache):
+    get(server, cache)
+    cache.ttl = 0
+    response = get(server, cache)
+    assert server.requests == 2
+    assert response.from_cache and response.content == b'<html>v1</html>'
+
+    cache.ttl = 3600
+    get(server, cache)
+    assert server.requests == 2
+
+
+def test_expired_page_that_changed_is_replaced(server, cache):
+    get(server, cache)
+    server.store.put(url_path, 200, b'<html>v2</html>', {'ETag': '"v2"'})
+    cache.ttl = 0
+    response = get(server, cache)
+    assert not response.from_cache and response.content == b'<html>v2</html>'
+    assert cache.get(server.url + url_path)['etag'] == '"v2"'
+
+
+def test_revalidate_bypasses_a_fresh_entry(server, cache):
+    get(server, cache)
+    get(server, cache, revalidate=True)
+    assert server.requests == 2
+
+
+def test_least_recently_used_pages_are_evicted_first(tmp_path, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr(page_cache.time, 'time', lambda: next(clock))
+    # Páginas incompresibles de 1000 bytes: caben tres
+    cache = page_cache.PageCache(str(tmp_path / 'pages'), max_bytes=3500)
+    pages = {name: os.urandom(1000) for name in 'abcd'}
+    for name in 'abc':
+        cache.put(name, pages[name])
+    assert cache.get('a')['body'] == pages['a']
+
+    cache.put('d', pages['d'])
+    assert cache.get('b') is None
+    assert all(cache.get(name)['body'] == pages[name] for name in 'acd')
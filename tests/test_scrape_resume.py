@@ -0,0 +1,132 @@
+"""Un scraping interrumpido se retoma desde su diario sin volver a descargar lo que ya tenía.
+
+Las páginas son sintéticas (benchmarks/bench_pipeline.synthetic_fixtures) y las sirve
+replay.ReplayServer; cada prueba usa su propio directorio y su propia caché de páginas.
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import nlp
+import page_cache
+import replay
+import scraper
+import storage
+from bench_pipeline import synthetic_fixtures
+from journal import ScrapeJournal
+from metrics import RunMetrics
+from review_stream import ReviewStream
+
+books = 5
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    # Servidor con una lista US/y de 'books' libros; el scraper escribe en tmp_path/out
+    monkeypatch.chdir(tmp_path)
+    store = synthetic_fixtures(str(tmp_path / 'fixtures'), books)
+    previous_cache = page_cache.set_default_cache(page_cache.PageCache(str(tmp_path / 'pages')))
+    with replay.ReplayServer(store) as server:
+        monkeypatch.setattr(scraper, 'base_url', server.url)
+        yield tmp_path / 'out'
+    page_cache.set_default_cache(previous_cache)
+
+
+def scrape(out, progress_callback=None, **kwargs):
+    # Devuelve (fichero, páginas parseadas): un libro retomado del diario no se vuelve a parsear
+    metrics = RunMetrics()
+    filename = scraper.scrape_and_save('US', 'y', str(out / 'US_most_read_books_y'), workers=1, rate=1000,
+                                       progress_callback=progress_callback, metrics=metrics, **kwargs)
+    return filename, metrics.summary()['pages']
+
+
+def crash_after(n):
+    def progress(done, total):
+        if done == n:
+            raise Crash()
+    return progress
+
+
+def test_crash_keeps_journal_and_resume_skips_downloaded_books(site):
+    with pytest.raises(Crash):
+        scrape(site, crash_after(2))
+    journal = ScrapeJournal(str(site / '.scrape_journal_US_y.jsonl'))
+    assert len(journal.load()) == 2
+    assert not storage.is_dataset(str(site / 'US_most_read_books_y'))
+
+    filename, pages = scrape(site)
+    # La lista y los 3 libros que faltaban
+    assert pages == 1 + books - 2
+    assert len(storage.read_books(filename)) == books
+    assert not os.path.exists(journal.path)
+
+
+def test_expired_journal_entries_are_not_resumed(site):
+    with pytest.raises(Crash):
+        scrape(site, crash_after(2))
+    path = site / '.scrape_journal_US_y.jsonl'
+    old = (datetime.now(timezone.utc) - scraper.detail_max_age - timedelta(days=1)).isoformat(timespec='seconds')
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    for entry in lines:
+        entry['started_at' if 'started_at' in entry else 'recorded_at'] = old
+    path.write_text(''.join(json.dumps(entry) + '\n' for entry in lines), encoding='utf-8')
+
+    _, pages = scrape(site)
+    assert pages == 1 + books
+
+
+def test_publishing_a_list_keeps_other_lists_journals(site):
+    site.mkdir()
+    other = ScrapeJournal.for_run(str(site), 'ES_y')
+    other.record('/book/show/es', {'synopsis': 'en curso'})
+    other_stream = ReviewStream.for_run(str(site), other.name)
+    with other_stream.open('/book/show/es') as f:
+        other_stream.write(f, [{'rating': 5, 'content': 'en curso'}])
+
+    scrape(site)
+    assert list(other.load()) == ['/book/show/es']
+    assert other_stream.has('/book/show/es')
+    other.release()
+
+
+def test_concurrent_runs_of_a_list_use_separate_journals(tmp_path):
+    with ScrapeJournal.for_run(str(tmp_path), 'US_y') as first, ScrapeJournal.for_run(str(tmp_path), 'US_y') as second:
+        assert first.path != second.path
+        assert ReviewStream.for_run(str(tmp_path), first.name).directory != \
+            ReviewStream.for_run(str(tmp_path), second.name).directory
+    with ScrapeJournal.for_run(str(tmp_path), 'US_y') as again:
+        assert again.path == first.path
+
+
+@pytest.mark.parametrize('suffix', ['', '.csv'])
+def test_incremental_run_copies_reused_reviews_without_loading_the_dataset(site, monkeypatch, suffix):
+    filename = str(site / f'US_most_read_books_y{suffix}')
+    scraper.scrape_and_save('US', 'y', filename, workers=1, rate=1000)
+    read_reviews_index = storage.read_reviews_index
+    before = read_reviews_index(filename)
+    first_synopsis = storage.read_books(filename)['Synopsis'][0]
+
+    # Solo el primer libro está caducado; las reseñas de los demás se copian del dataset anterior por lotes
+    monkeypatch.setattr(scraper, 'is_stale', lambda details, max_age=None: details['synopsis'] == first_synopsis)
+    monkeypatch.setattr(storage, 'read_reviews_index', None)
+    metrics = RunMetrics()
+    scraper.scrape_and_save('US', 'y', filename, workers=1, rate=1000, incremental=True, metrics=metrics)
+
+    assert metrics.summary()['pages'] == 2
+    assert read_reviews_index(filename) == before
+
+
+def test_analysis_is_precomputed_next_to_the_dataset(site, tmp_path, monkeypatch):
+    filename, _ = scrape(site)
+    # El dashboard se abre desde otro directorio y encuentra el análisis sin volver a calcularlo
+    monkeypatch.chdir(tmp_path / 'fixtures')
+    monkeypatch.setattr(nlp, 'build_review_analysis', None)
+    scores, words = nlp.load_review_analysis(storage.content_hash(filename), None, nlp.analysis_dir_for(filename))
+    assert len(scores) and len(words)
+    assert os.path.isdir(site / '.cache' / 'analysis')
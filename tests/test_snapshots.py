@@ -0,0 +1,37 @@
+"""Un libro importado de un CSV antiguo (sin href) y el mismo libro scrapeado después son uno solo en el histórico."""
+import os
+
+import pandas as pd
+
+import snapshots
+from conftest import repo_dir
+
+
+def old_csv_books():
+    return pd.read_csv(os.path.join(repo_dir, 'US_most_read_books_y.csv')).head(3)
+
+
+def scraped_books(books):
+    # Lo que guardaría un scraping posterior: con href, títulos con otros espacios y otro orden
+    scraped = books.iloc[::-1].reset_index(drop=True)
+    scraped['Ranking'] = range(1, len(scraped) + 1)
+    scraped['Título'] = '  ' + scraped['Título'].astype(str) + '\n'
+    scraped['Número de lectores'] = books['Número de lectores'].iloc[::-1].to_numpy() + 100
+    scraped['href'] = [f'/book/show/{i}' for i in range(len(scraped))]
+    return scraped
+
+
+def test_history_follows_books_across_the_import_boundary(tmp_path):
+    store = snapshots.SnapshotStore(str(tmp_path / 'snapshots.sqlite'))
+    books = old_csv_books()
+    store.add_snapshot('US', 'y', books, '2025-01-01')
+    store.add_snapshot('US', 'y', scraped_books(books), '2025-02-01')
+
+    assert store.db.execute('SELECT COUNT(*) FROM books').fetchone()[0] == len(books)
+    movement = store.movement('US', 'y').set_index('Ranking')
+    assert (movement['Primera fecha'] == '2025-01-01').all()
+    assert (movement['Última fecha'] == '2025-02-01').all()
+    assert (movement['Nuevos lectores'] == 100).all()
+    assert movement.loc[1, 'Cambio de posición'] == len(books) - 1
+    assert movement['href'].str.startswith('/book/show/').all()
+    store.close()